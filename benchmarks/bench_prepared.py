@@ -0,0 +1,79 @@
+"""
+Бенчмарк подготовленных запросов.
+Для каждого запроса из реестра сравнивается прежнее выполнение текста
+запроса через cursor.execute (разбор и планирование на каждый вызов)
+и EXECUTE заранее подготовленного оператора на том же соединении.
+
+Запуск из корня репозитория: python -m benchmarks.bench_prepared
+Нужен доступный DATABASE_URL со схемой бота.
+"""
+
+import argparse
+import os
+import re
+import time
+from datetime import date, datetime, timedelta
+
+import psycopg2
+from psycopg2.extras import DictCursor
+
+from bot.queries import QUERIES
+
+
+def _params(user_id):
+    """Параметры для запросов на чтение, сопоставимые с реальными"""
+    now = datetime.combine(date.today(), datetime.min.time())
+    return {
+        'get_user_events': (user_id,),
+        'get_event': (user_id, 1),
+        'search_events': ('встреча', user_id, 10, 0),
+        'search_events_fuzzy': ('встреча', user_id, 10, 0),
+        'find_conflicts': (user_id, now, now + timedelta(hours=1), None),
+        'get_busy_intervals': (user_id, now, now + timedelta(days=1)),
+        'get_user_state': (user_id,),
+    }
+
+
+def _plain_sql(sql):
+    """Текст запроса с параметрами psycopg2 вместо $1, $2, ..."""
+    return re.sub(r'\$(\d+)', r'%(p\1)s', sql.replace('%', '%%'))
+
+
+def run(cursor, statement, args, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        cursor.execute(statement, args)
+        cursor.fetchall()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--user-id', type=int, default=1)
+    args = parser.parse_args()
+    
+    conn = psycopg2.connect(os.environ['DATABASE_URL'],
+                            cursor_factory=DictCursor)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        for name, params in _params(args.user_id).items():
+            query = QUERIES[name]
+            named = {f'p{i}': value for i, value in enumerate(params, 1)}
+            plain = run(cursor, _plain_sql(query.sql), named,
+                        args.iterations)
+            
+            cursor.execute(query.prepare_sql)
+            prepared = run(cursor, query.execute_sql, params,
+                           args.iterations)
+            cursor.execute(f'DEALLOCATE {query.name}')
+            
+            per_call = 1e6 / args.iterations
+            print(f"{name:<22} plain {plain * per_call:8.1f} us"
+                  f"   prepared {prepared * per_call:8.1f} us"
+                  f"   x{plain / prepared:5.2f}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Бенчмарк рендеринга списка событий для /my_events.
+Сравнивает прежнюю сборку через += и нарезку по 4096 символов с
+bot.rendering (экранированные фрагменты, join, упаковка по сообщениям)
+на холодном и прогретом кэше фрагментов.
+
+Запуск из корня репозитория: python -m benchmarks.bench_rendering
+"""
+
+import argparse
+import time
+from datetime import date, time as dtime, timedelta
+from bot import rendering
+
+
+def make_events(count):
+    start = date(2025, 1, 1)
+    return [
+        {
+            'id': i,
+            'event_name': f"Встреча <{i}> & обсуждение",
+            'event_date': start + timedelta(days=i % 365),
+            'event_time': dtime(9 + i % 10, 30) if i % 3 else None,
+            'event_details': "Описание события " * (i % 5) or None,
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_render(events):
+    """Прежний алгоритм CommandHandlers.my_events."""
+    events_text = "📅 <b>Ваши события:</b>\n\n"
+    for event in events:
+        events_text += (
+            f"🆔 {event['id']}\n"
+            f"📝 {event['event_name']}\n"
+            f"📅 {event['event_date']}"
+        )
+        if event.get('event_time'):
+            events_text += f" ⏰ {event['event_time']}"
+        if event.get('event_details'):
+            events_text += f"\n📋 {event['event_details']}"
+        events_text += "\n" + "-" * 30 + "\n"
+    return [events_text[i:i + 4096] for i in range(0, len(events_text), 4096)]
+
+
+def new_render(events):
+    return rendering.render_events(events, "📅 <b>Ваши события:</b>\n\n")
+
+
+def measure(func, events, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(events)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    events = make_events(args.events)
+    
+    legacy = measure(legacy_render, events, args.repeat)
+    rendering._render_fragment.cache_clear()
+    cold = measure(new_render, events, 1)
+    warm = measure(new_render, events, args.repeat)
+    
+    print(f"events={args.events}")
+    print(f"legacy (+=, no escaping): {legacy * 1000:8.2f} ms")
+    print(f"rendering, cold cache:    {cold * 1000:8.2f} ms")
+    print(f"rendering, warm cache:    {warm * 1000:8.2f} ms")
+    print(f"messages: {len(new_render(events))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Бенчмарк холодного старта бота.
+Каждый этап замеряется в отдельном процессе интерпретатора:
+импорт точки входа, подключение к БД с выполнением DDL (прежнее
+поведение) и без него (DB_AUTO_MIGRATE=False), прогрев пула.
+
+Запуск из корня репозитория: python -m benchmarks.bench_startup
+Для этапов с БД нужен доступный DATABASE_URL.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+STAGES = {
+    'import bot.main': (
+        "import time; t = time.perf_counter(); import bot.main; "
+        "print(time.perf_counter() - t)"
+    ),
+    'import bot.handlers (eager path)': (
+        "import time; t = time.perf_counter(); import bot.handlers; "
+        "print(time.perf_counter() - t)"
+    ),
+    'Database() with DDL': (
+        "import time; from bot.database import Database; "
+        "t = time.perf_counter(); db = Database(auto_migrate=True); "
+        "print(time.perf_counter() - t)"
+    ),
+    'Database() without DDL + warm_up': (
+        "import time; from bot.database import Database; "
+        "t = time.perf_counter(); db = Database(auto_migrate=False); "
+        "db.warm_up(); print(time.perf_counter() - t)"
+    ),
+}
+
+
+def run_stage(code):
+    result = subprocess.run([sys.executable, '-c', code],
+                            capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONPATH': os.getcwd()})
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    return float(result.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    for name, code in STAGES.items():
+        timings = []
+        error = None
+        for _ in range(args.repeat):
+            elapsed, error = run_stage(code)
+            if elapsed is None:
+                break
+            timings.append(elapsed)
+        if error:
+            print(f"{name:<36} skipped: {error}")
+            continue
+        timings.sort()
+        print(f"{name:<36} median {timings[len(timings) // 2] * 1000:8.1f} ms"
+              f"   min {timings[0] * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Бенчмарк масштабирования бота по процессам.
+Прогоняет синтетические обновления через WorkerPool с тем же
+шардированием по user_id, что и в боте, и сравнивает пропускную
+способность при разном числе воркеров.
+
+Запуск из корня репозитория: python -m benchmarks.bench_workers
+"""
+
+import argparse
+import os
+import time
+from bot.workers import WorkerPool
+
+
+def burn(iterations):
+    """Имитация CPU-работы обработчика (разбор, рендеринг ответа)."""
+    total = 0
+    for i in range(iterations):
+        total += i * i % 7
+    return total
+
+
+def bench_worker(index, queue, iterations, done):
+    """Воркер бенчмарка: обрабатывает элементы до None."""
+    processed = 0
+    done.put('ready')
+    while True:
+        item = queue.get()
+        if item is None:
+            break
+        burn(iterations)
+        processed += 1
+    done.put(processed)
+
+
+def run(num_workers, updates, users, iterations):
+    import multiprocessing
+    done = multiprocessing.get_context('spawn').Queue()
+    pool = WorkerPool(num_workers, bench_worker, args=(iterations, done))
+    pool.start()
+    # Время запуска процессов в замер не входит.
+    for _ in range(num_workers):
+        done.get()
+    
+    started = time.perf_counter()
+    for update_id in range(updates):
+        user_id = update_id % users
+        pool.submit(user_id, {'update_id': update_id, 'user_id': user_id})
+    pool.stop()
+    elapsed = time.perf_counter() - started
+    
+    processed = sum(done.get() for _ in range(num_workers))
+    assert processed == updates
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--updates', type=int, default=4000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=50000)
+    parser.add_argument('--max-workers', type=int,
+                        default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    
+    baseline = None
+    workers = 1
+    while workers <= args.max_workers:
+        elapsed = run(workers, args.updates, args.users, args.iterations)
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} {args.updates / elapsed:10.0f} upd/s "
+              f"speedup={baseline / elapsed:5.2f}x")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
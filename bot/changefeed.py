@@ -0,0 +1,121 @@
+import asyncio
+import json
+import logging
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from .database import APPLICATION_NAME, EVENTS_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# Тексты уведомлений по типу операции.
+CHANGE_MESSAGES = {
+    'insert': "🔔 Событие {id} создано через API.",
+    'update': "🔔 Событие {id} изменено через API.",
+    'delete': "🔔 Событие {id} удалено через API.",
+}
+# То же для участников общего календаря события.
+GROUP_CHANGE_MESSAGES = {
+    'insert': "➕ Событие {id} добавлено через API",
+    'update': "✏️ Событие {id} изменено через API",
+    'delete': "🗑 Событие {id} удалено через API",
+}
+
+
+class ChangeNotifier:
+    """Пересылает пользователям уведомления об изменениях их событий.
+    
+    Одно LISTEN-соединение на процесс встроено в event loop бота через
+    add_reader, поэтому уведомления приходят сразу, без опроса БД.
+    Изменения, сделанные самим ботом, пропускаются. Изменения событий
+    общего календаря передаются и участникам через group_notifier.
+    """
+    
+    def __init__(self, connection_string, accepts=None, group_notifier=None,
+                 calendar=None):
+        self.connection_string = connection_string
+        self.accepts = accepts or (lambda user_id: True)
+        self.group_notifier = group_notifier
+        self.calendar = calendar
+        self._conn = None
+        self._fd = None
+        self._application = None
+    
+    async def start(self, application):
+        """Подключается к БД и начинает слушать канал"""
+        self._application = application
+        self._conn = psycopg2.connect(self.connection_string,
+                                      application_name=APPLICATION_NAME)
+        self._conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {EVENTS_CHANNEL}')
+        self._fd = self._conn.fileno()
+        asyncio.get_running_loop().add_reader(self._fd, self._on_readable)
+        logger.info("Лента изменений событий подключена")
+    
+    async def stop(self, application=None):
+        """Отключается от канала"""
+        if self._conn is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._fd)
+        self._conn.close()
+        self._conn = None
+    
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except psycopg2.Error as e:
+            logger.error(f"Change feed connection lost: {e}")
+            asyncio.get_running_loop().create_task(self._reconnect())
+            return
+        
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            try:
+                change = json.loads(notify.payload)
+            except ValueError:
+                continue
+            if change.get('source') == APPLICATION_NAME:
+                continue
+            if not self.accepts(change['user_id']):
+                continue
+            asyncio.get_running_loop().create_task(self._push(change))
+            if change.get('calendar_id') and self.group_notifier:
+                asyncio.get_running_loop().create_task(
+                    self._push_group(change))
+    
+    async def _reconnect(self, delay=1, max_delay=30):
+        await self.stop()
+        while self._conn is None:
+            try:
+                await self.start(self._application)
+            except psycopg2.Error as e:
+                logger.error(f"Change feed reconnect failed: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_delay)
+    
+    async def _push(self, change):
+        template = CHANGE_MESSAGES.get(change['op'])
+        if template is None:
+            return
+        try:
+            await self._application.bot.send_message(
+                chat_id=change['user_id'],
+                text=template.format(id=change['id'])
+            )
+        except Exception as e:
+            logger.error(f"Error pushing change to {change['user_id']}: {e}")
+    
+    async def _push_group(self, change):
+        template = GROUP_CHANGE_MESSAGES.get(change['op'])
+        if template is None:
+            return
+        try:
+            calendar = self.calendar.get_calendar(change['calendar_id'])
+        except Exception as e:
+            logger.error(f"Error loading calendar "
+                         f"{change['calendar_id']}: {e}")
+            return
+        if calendar is not None:
+            self.group_notifier.notify(self._application, calendar,
+                                       change['user_id'],
+                                       template.format(id=change['id']))
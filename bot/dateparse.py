@@ -0,0 +1,200 @@
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# Дни недели: (регулярное выражение, номер дня по date.weekday()).
+WEEKDAYS = (
+    (r'понедельник\w*|monday', 0),
+    (r'вторник\w*|tuesday', 1),
+    (r'сред[аеуы]|wednesday', 2),
+    (r'четверг\w*|thursday', 3),
+    (r'пятниц[аеуы]|friday', 4),
+    (r'суббот[аеуы]|saturday', 5),
+    (r'воскресень[еяю]|sunday', 6),
+)
+
+RELATIVE_DAYS = {
+    'сегодня': 0, 'today': 0,
+    'завтра': 1, 'tomorrow': 1,
+    'послезавтра': 2, 'day after tomorrow': 2,
+}
+
+_WEEKDAY_ALTERNATION = '|'.join(f'(?P<wd{n}>{p})' for p, n in WEEKDAYS)
+_RELATIVE_ALTERNATION = '|'.join(
+    re.escape(word) for word in sorted(RELATIVE_DAYS, key=len, reverse=True)
+)
+
+# Время начала или интервал: 14:30 либо 14:30-15:45.
+TIME_PATTERN = re.compile(r'^(\d{2}:\d{2})(?:\s*-\s*(\d{2}:\d{2}))?$')
+
+# Грамматика даты: ISO, ДД.ММ[.ГГГГ], относительные слова,
+# «через N дней» / «in N days» и дни недели с необязательным «next».
+# ДД.ММ не выделяется из более длинных чисел вроде версии 1.2.3.
+DATE_GRAMMAR = re.compile(
+    r'(?<!\w)(?:'
+    r'(?P<iso>\d{4}-\d{2}-\d{2})'
+    r'|(?<![.\d])(?P<dmy>\d{1,2}\.\d{1,2}(?:\.\d{4})?)(?![.\d])'
+    rf'|(?P<relative>{_RELATIVE_ALTERNATION})'
+    r'|(?:через|in)\s+(?P<in_days>\d{1,3})\s+'
+    r'(?:день|дня|дней|days?)'
+    r'|(?:(?:в|во|on)\s+)?(?P<next>(?:следующ\w*|next)\s+)?'
+    rf'(?:{_WEEKDAY_ALTERNATION})'
+    r')(?!\w)',
+    re.IGNORECASE
+)
+
+# Грамматика времени: 14:30, 9:05, 14:30-15:45, 10am, с необязательным
+# предлогом «в» / «at».
+TIME_GRAMMAR = re.compile(
+    r'(?<!\w)(?:(?:в|at)\s+)?(?:'
+    r'(?P<start>\d{1,2}:\d{2})(?:\s*-\s*(?P<end>\d{1,2}:\d{2}))?'
+    r'|(?P<hour12>\d{1,2})\s*(?P<ampm>am|pm)'
+    r')(?!\w)',
+    re.IGNORECASE
+)
+
+
+class QuickEvent(NamedTuple):
+    """Результат разбора однострочного описания события"""
+    name: str
+    date: Optional[str]
+    time: Optional[str]
+    duration: Optional[int]
+    details: Optional[str]
+
+
+def _resolve_date(match, today: date) -> Optional[date]:
+    """Переводит найденное грамматикой выражение в дату"""
+    if match.group('iso'):
+        return datetime.strptime(match.group('iso'), '%Y-%m-%d').date()
+    
+    if match.group('dmy'):
+        parts = [int(p) for p in match.group('dmy').split('.')]
+        day, month = parts[0], parts[1]
+        year = parts[2] if len(parts) == 3 else today.year
+        result = date(year, month, day)
+        # Дата без года, уже прошедшая в этом году, - это следующий год.
+        if len(parts) == 2 and result < today:
+            result = date(year + 1, month, day)
+        return result
+    
+    if match.group('relative'):
+        word = ' '.join(match.group('relative').lower().split())
+        return today + timedelta(days=RELATIVE_DAYS[word])
+    
+    if match.group('in_days'):
+        return today + timedelta(days=int(match.group('in_days')))
+    
+    for _, weekday in WEEKDAYS:
+        if match.group(f'wd{weekday}'):
+            days_ahead = (weekday - today.weekday()) % 7
+            if match.group('next') and days_ahead == 0:
+                days_ahead = 7
+            return today + timedelta(days=days_ahead)
+    return None
+
+
+def _time_range(start_str, end_str=None):
+    """Время начала 'ЧЧ:ММ' и длительность в минутах (None без конца)"""
+    start = datetime.strptime(start_str, '%H:%M')
+    if not end_str:
+        return start.strftime('%H:%M'), None
+    end = datetime.strptime(end_str, '%H:%M')
+    if end <= start:
+        raise ValueError("end must be after start")
+    return start.strftime('%H:%M'), int((end - start).total_seconds()) // 60
+
+
+def parse_time_range(value):
+    """Разбирает 'ЧЧ:ММ' или 'ЧЧ:ММ-ЧЧ:ММ' (совпадение TIME_PATTERN).
+    
+    Возвращает время начала и длительность в минутах (None, если
+    окончание не указано). Бросает ValueError для несуществующего
+    времени или окончания раньше начала.
+    """
+    return _time_range(*TIME_PATTERN.match(value).groups())
+
+
+def _resolve_time(match):
+    """Возвращает время начала 'ЧЧ:ММ' и длительность в минутах"""
+    if match.group('hour12'):
+        hour = int(match.group('hour12'))
+        if not 1 <= hour <= 12:
+            raise ValueError("hour must be in 1..12")
+        hour %= 12
+        if match.group('ampm').lower() == 'pm':
+            hour += 12
+        return f'{hour:02d}:00', None
+    return _time_range(match.group('start'), match.group('end'))
+
+
+@lru_cache(maxsize=1024)
+def _parse_date_cached(text: str, today: date) -> Optional[date]:
+    match = DATE_GRAMMAR.fullmatch(text)
+    if not match:
+        return None
+    try:
+        return _resolve_date(match, today)
+    except ValueError:
+        return None
+
+
+def parse_date(text: str, today: Optional[date] = None) -> Optional[str]:
+    """Разбирает дату ('2025-12-15', '15.12', 'завтра', 'пятница').
+    
+    Возвращает дату в формате ГГГГ-ММ-ДД или None.
+    """
+    today = today or date.today()
+    result = _parse_date_cached(' '.join(text.lower().split()), today)
+    return result.isoformat() if result else None
+
+
+@lru_cache(maxsize=1024)
+def _parse_quick_cached(text: str, today: date) -> Optional[QuickEvent]:
+    head, _, details = text.partition('#')
+    
+    # Первое выражение, которое действительно является датой: «2.0» в
+    # названии похоже на ДД.ММ, но не разрешается и пропускается.
+    for date_match in DATE_GRAMMAR.finditer(head):
+        try:
+            event_date = _resolve_date(date_match, today)
+        except ValueError:
+            continue
+        if event_date is not None:
+            break
+    else:
+        return None
+    head = head[:date_match.start()] + ' ' + head[date_match.end():]
+    
+    event_time = duration = None
+    time_match = TIME_GRAMMAR.search(head)
+    if time_match:
+        try:
+            event_time, duration = _resolve_time(time_match)
+        except ValueError:
+            return None
+        head = head[:time_match.start()] + ' ' + head[time_match.end():]
+    
+    name = ' '.join(head.split())
+    if not name:
+        return None
+    return QuickEvent(
+        name=name,
+        date=event_date.isoformat(),
+        time=event_time,
+        duration=duration,
+        details=details.strip() or None,
+    )
+
+
+def parse_quick_event(text: str,
+                      today: Optional[date] = None) -> Optional[QuickEvent]:
+    """Разбирает строку вида 'Планерка завтра 10:00 #описание'.
+    
+    Название - все, что осталось после извлечения даты и времени;
+    описание - текст после '#'. Недавние результаты кэшируются, поэтому
+    повторные одинаковые запросы не проходят грамматику заново.
+    """
+    today = today or date.today()
+    return _parse_quick_cached(text.strip(), today)
@@ -0,0 +1,95 @@
+import logging
+from collections import OrderedDict
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDeduplicator:
+    """Отбрасывает повторно доставленные Telegram обновления.
+    
+    Недавние update_id хранятся в ограниченном множестве в памяти.
+    Все, что старше вытесненных из него, а также не выше сохраненной
+    в БД отметки (high-water mark), считается уже обработанным.
+    Отметка записывается раз в persist_every обновлений и при остановке,
+    поэтому после рестарта повторы не порождают дубликаты событий.
+    
+    После недели без обновлений Bot API может начать нумерацию заново
+    со случайного update_id. Скачок назад больше чем на max_size ниже
+    отметки считается такой сменой нумерации, а не повтором.
+    """
+    
+    def __init__(self, db, name='bot', max_size=10000, persist_every=50):
+        self.db = db
+        self.name = name
+        self.max_size = max_size
+        self.persist_every = persist_every
+        self._seen = OrderedDict()
+        self._floor = self._load_high_water_mark()
+        self._high_water_mark = self._floor
+        self._unsaved = 0
+        self.dropped = 0
+    
+    def _load_high_water_mark(self):
+        """Читает сохраненную отметку последнего обработанного update_id"""
+        with self.db.get_cursor() as cursor:
+            cursor.execute('''
+                SELECT update_id FROM bot_offsets WHERE name = %s
+            ''', (self.name,))
+            result = cursor.fetchone()
+            return result['update_id'] if result else 0
+    
+    def persist(self):
+        """Сохраняет отметку в БД, если она сдвинулась"""
+        if not self._unsaved:
+            return
+        with self.db.get_cursor() as cursor:
+            cursor.execute('''
+                INSERT INTO bot_offsets (name, update_id)
+                VALUES (%s, %s)
+                ON CONFLICT (name)
+                DO UPDATE SET update_id = EXCLUDED.update_id
+            ''', (self.name, self._high_water_mark))
+        self._unsaved = 0
+    
+    def is_duplicate(self, update_id):
+        """Проверяет update_id и запоминает его как обработанный"""
+        if update_id < self._floor - self.max_size:
+            logger.warning(f"Update id dropped from {self._floor} to "
+                           f"{update_id}: resetting offsets")
+            self._seen.clear()
+            self._floor = update_id - 1
+            self._high_water_mark = update_id - 1
+        
+        if update_id <= self._floor or update_id in self._seen:
+            self.dropped += 1
+            return True
+        
+        self._seen[update_id] = None
+        if len(self._seen) > self.max_size:
+            evicted, _ = self._seen.popitem(last=False)
+            self._floor = max(self._floor, evicted)
+        
+        if update_id > self._high_water_mark:
+            self._high_water_mark = update_id
+            self._unsaved += 1
+            if self._unsaved >= self.persist_every:
+                try:
+                    self.persist()
+                except Exception as e:
+                    logger.error(f"Error saving update offset: {e}")
+        return False
+    
+    async def check(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик высокого приоритета: останавливает дубликаты"""
+        if self.is_duplicate(update.update_id):
+            logger.info(f"Duplicate update {update.update_id} skipped")
+            raise ApplicationHandlerStop
+    
+    async def shutdown(self, application):
+        """Сохраняет отметку при остановке приложения"""
+        try:
+            self.persist()
+        except Exception as e:
+            logger.error(f"Error saving update offset: {e}")
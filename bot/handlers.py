@@ -1,22 +1,48 @@
+import html
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 from .states import UserState, EventData, UserStateManager
-from .database import Calendar
+from .database import Calendar, DEFAULT_DURATION_MINUTES
+from .dateparse import (TIME_PATTERN, parse_date, parse_quick_event,
+                        parse_time_range)
+from .intervals import Interval, IntervalTree
+from .profiling import PROFILE_MODES
+from .rendering import (MESSAGE_LIMIT, QUERY_LIMIT, escape_truncated,
+                        message_length, render_events)
 import re
 
 logger = logging.getLogger(__name__)
 
 # Паттерны валидации.
 DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
-TIME_PATTERN = re.compile(r'^\d{2}:\d{2}$')
+
+# Рабочее окно, в котором /free ищет свободные промежутки.
+FREE_DAY_START = timedelta(hours=8)
+FREE_DAY_END = timedelta(hours=22)
+FREE_MIN_SLOT = timedelta(minutes=15)
+
+# Количество результатов поиска в одном ответе.
+SEARCH_PAGE_SIZE = 10
+
+# Типы чатов, в которых работает общий календарь.
+GROUP_CHAT_TYPES = ('group', 'supergroup')
 
 
 class CommandHandlers:
-    def __init__(self, calendar: Calendar, state_manager: UserStateManager):
+    def __init__(self, calendar: Calendar, state_manager: UserStateManager,
+                 admin_ids=(), notifier=None, profiler=None, throttle=None):
         self.calendar = calendar
         self.state_manager = state_manager
+        self.admin_ids = set(admin_ids)
+        self.notifier = notifier
+        self.profiler = profiler
+        self.throttle = throttle
+    
+    def is_admin(self, update: Update):
+        """Является ли отправитель администратором бота."""
+        return update.effective_user.id in self.admin_ids
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start."""
@@ -25,7 +51,11 @@ class CommandHandlers:
             f"Привет, {user.first_name}! Я Антон-бот-календарь.\n\n"
             "Доступные команды:\n"
             "/create_event - создать событие\n"
+            "/add - быстро создать событие одной строкой\n"
             "/my_events - показать мои события\n"
+            "/find - найти событие по тексту\n"
+            "/free - свободное время на дату\n"
+            "/group_calendar - общие календари групп\n"
             "/edit_event - редактировать событие\n"
             "/delete_event - удалить событие\n"
             "/cancel - отменить текущую операцию\n"
@@ -42,8 +72,20 @@ class CommandHandlers:
 <b>Команды:</b>
 /create_event - Создать новое событие (пошагово)
 
+/add Планерка завтра 10:00 #описание - Создать событие одной строкой
+
 /my_events - Показать все мои события
 
+/find текст [страница] - Найти события по названию и описанию
+
+/free дата - Показать свободное время на дату
+
+<b>В групповом чате:</b>
+/group_calendar - Создать общий календарь чата
+/join, /leave - Вступить в календарь или выйти из него
+/add ... - Добавить событие в общий календарь
+/group_events - Показать события общего календаря
+
 /edit_event - Редактировать событие (пошагово)
 
 /delete_event - Удалить событие (пошагово)
@@ -52,7 +94,7 @@ class CommandHandlers:
 
 <b>Примеры даты и времени:</b>
 Дата: 2025-12-15 (ГГГГ-ММ-ДД)
-Время: 14:30 (ЧЧ:ММ)
+Время: 14:30 (ЧЧ:ММ) или 14:30-15:45 (с окончанием)
         """
         await update.message.reply_text(help_text, parse_mode='HTML')
         return ConversationHandler.END
@@ -88,7 +130,7 @@ class CommandHandlers:
         
         await update.message.reply_text(
             "Введите дату события в формате ГГГГ-ММ-ДД:\n"
-            "Пример: 2025-12-15"
+            "Пример: 2025-12-15, 15.12, завтра или пятница"
         )
         return UserState.AWAITING_EVENT_DATE.value
     
@@ -96,23 +138,20 @@ class CommandHandlers:
                                 context: ContextTypes.DEFAULT_TYPE):
         """Обработка даты события."""
         user_id = update.effective_user.id
-        date_str = update.message.text.strip()
+        date_str = parse_date(update.message.text.strip())
         
-        if not DATE_PATTERN.match(date_str):
-            await update.message.reply_text(
-                "❌ Неверный формат даты. Используйте ГГГГ-ММ-ДД\n"
-                "Пример: 2025-12-15\n"
-                "Попробуйте еще раз:"
-            )
-            return UserState.AWAITING_EVENT_DATE.value
-        
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d')
-        except ValueError:
-            await update.message.reply_text(
-                "❌ Несуществующая дата. Проверьте правильность ввода:\n"
-                "Попробуйте еще раз:"
-            )
+        if date_str is None:
+            if DATE_PATTERN.match(update.message.text.strip()):
+                await update.message.reply_text(
+                    "❌ Несуществующая дата. Проверьте правильность ввода:\n"
+                    "Попробуйте еще раз:"
+                )
+            else:
+                await update.message.reply_text(
+                    "❌ Неверный формат даты. Используйте ГГГГ-ММ-ДД\n"
+                    "Пример: 2025-12-15, 15.12, завтра или пятница\n"
+                    "Попробуйте еще раз:"
+                )
             return UserState.AWAITING_EVENT_DATE.value
         
         state, event_data = self.state_manager.get_user_state(user_id)
@@ -122,9 +161,9 @@ class CommandHandlers:
                                           event_data)
         
         await update.message.reply_text(
-            "Введите время события в формате ЧЧ:ММ (или отправьте '-' чтобы "
-            "пропустить):\n"
-            "Пример: 14:30"
+            "Введите время события в формате ЧЧ:ММ или ЧЧ:ММ-ЧЧ:ММ "
+            "(или отправьте '-' чтобы пропустить):\n"
+            "Пример: 14:30 или 14:30-15:45"
         )
         return UserState.AWAITING_EVENT_TIME.value
     
@@ -133,18 +172,20 @@ class CommandHandlers:
         """Обработка времени события."""
         user_id = update.effective_user.id
         time_str = update.message.text.strip()
+        duration = None
         
         if time_str != '-':
             if not TIME_PATTERN.match(time_str):
                 await update.message.reply_text(
-                    "❌ Неверный формат времени. Используйте ЧЧ:ММ\n"
+                    "❌ Неверный формат времени. Используйте ЧЧ:ММ "
+                    "или ЧЧ:ММ-ЧЧ:ММ\n"
                     "Пример: 14:30\n"
                     "Попробуйте еще раз (или '-' чтобы пропустить):"
                 )
                 return UserState.AWAITING_EVENT_TIME.value
             
             try:
-                datetime.strptime(time_str, '%H:%M')
+                time_str, duration = parse_time_range(time_str)
             except ValueError:
                 await update.message.reply_text(
                     "❌ Неверное время. Проверьте правильность ввода:\n"
@@ -153,7 +194,19 @@ class CommandHandlers:
                 return UserState.AWAITING_EVENT_TIME.value
         
         state, event_data = self.state_manager.get_user_state(user_id)
+        
+        if time_str != '-':
+            conflicts = self.calendar.find_conflicts(
+                user_id, event_data.date, time_str, duration)
+            if conflicts:
+                await update.message.reply_text(
+                    self._conflicts_text(conflicts) +
+                    "\nВведите другое время (или '-' чтобы пропустить):"
+                )
+                return UserState.AWAITING_EVENT_TIME.value
+        
         event_data.time = None if time_str == '-' else time_str
+        event_data.duration = duration
         self.state_manager.set_user_state(user_id,
                                           UserState.AWAITING_EVENT_DETAILS,
                                           event_data)
@@ -179,7 +232,8 @@ class CommandHandlers:
                 event_name=event_data.name,
                 event_date=event_data.date,
                 event_time=event_data.time,
-                event_details=event_data.details
+                event_details=event_data.details,
+                duration_minutes=event_data.duration
             )
             
             response_text = (
@@ -191,6 +245,8 @@ class CommandHandlers:
             
             if event_data.time:
                 response_text += f"\n⏰ Время: {event_data.time}"
+                if event_data.duration:
+                    response_text += f" ({event_data.duration} мин)"
             if event_data.details:
                 response_text += f"\n📋 Описание: {event_data.details}"
             
@@ -206,6 +262,65 @@ class CommandHandlers:
         self.state_manager.clear_user_state(user_id)
         return ConversationHandler.END
     
+    async def quick_add(self, update: Update,
+                        context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /add: создание события одним сообщением."""
+        user_id = update.effective_user.id
+        text = update.message.text.partition(' ')[2]
+        quick_event = parse_quick_event(text)
+        
+        if quick_event is None:
+            await update.message.reply_text(
+                "❌ Не удалось разобрать событие. Укажите название и дату:\n"
+                "/add Планерка завтра 10:00 #описание\n"
+                "/add Report friday 14:00-15:30"
+            )
+            return ConversationHandler.END
+        
+        if update.effective_chat.type in GROUP_CHAT_TYPES:
+            return await self._group_add(update, context, quick_event)
+        
+        try:
+            conflicts = self.calendar.find_conflicts(
+                user_id, quick_event.date, quick_event.time,
+                quick_event.duration)
+            if conflicts:
+                await update.message.reply_text(
+                    self._conflicts_text(conflicts))
+                return ConversationHandler.END
+            
+            event_id = self.calendar.create_event(
+                user_id=user_id,
+                event_name=quick_event.name,
+                event_date=quick_event.date,
+                event_time=quick_event.time,
+                event_details=quick_event.details,
+                duration_minutes=quick_event.duration
+            )
+            
+            response_text = (
+                f"✅ Событие создано!\n"
+                f"🆔 ID: {event_id}\n"
+                f"📝 Название: {quick_event.name}\n"
+                f"📅 Дата: {quick_event.date}"
+            )
+            if quick_event.time:
+                response_text += f"\n⏰ Время: {quick_event.time}"
+                if quick_event.duration:
+                    response_text += f" ({quick_event.duration} мин)"
+            if quick_event.details:
+                response_text += f"\n📋 Описание: {quick_event.details}"
+            
+            await update.message.reply_text(response_text)
+        
+        except Exception as e:
+            logger.error(f"Error creating event: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при создании события. Попробуйте еще раз."
+            )
+        
+        return ConversationHandler.END
+    
     async def my_events(self, update: Update,
                         context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /my_events."""
@@ -218,31 +333,411 @@ class CommandHandlers:
                 await update.message.reply_text("📭 У вас пока нет событий.")
                 return ConversationHandler.END
             
-            events_text = "📅 <b>Ваши события:</b>\n\n"
-            for event in events:
-                events_text += (
-                    f"🆔 {event['id']}\n"
-                    f"📝 {event['event_name']}\n"
-                    f"📅 {event['event_date']}"
+            # Сообщения собираются из экранированных фрагментов целыми
+            # событиями, без разрыва записей и HTML-тегов.
+            for text in render_events(events, "📅 <b>Ваши события:</b>\n\n"):
+                await update.message.reply_text(text, parse_mode='HTML')
+        
+        except Exception as e:
+            logger.error(f"Error getting events: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при получении событий.")
+        
+        return ConversationHandler.END
+    
+    async def find_events(self, update: Update,
+                          context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /find текст [страница]."""
+        user_id = update.effective_user.id
+        args = list(context.args or [])
+        page = 1
+        if len(args) > 1 and args[-1].isdigit() and int(args[-1]) > 0:
+            page = int(args.pop())
+        query = ' '.join(args).strip()
+        
+        if not query:
+            await update.message.reply_text(
+                "Укажите текст для поиска.\n"
+                "Пример: /find встреча"
+            )
+            return ConversationHandler.END
+        
+        try:
+            # Лишняя запись показывает, есть ли следующая страница.
+            events = self.calendar.search_events(
+                user_id, query, limit=SEARCH_PAGE_SIZE + 1,
+                offset=(page - 1) * SEARCH_PAGE_SIZE)
+            has_more = len(events) > SEARCH_PAGE_SIZE
+            events = events[:SEARCH_PAGE_SIZE]
+            
+            if not events:
+                text = "🔍 Ничего не найдено."
+                if page > 1:
+                    text = f"🔍 На странице {page} результатов нет."
+                await update.message.reply_text(text)
+                return ConversationHandler.END
+            
+            escaped_query = escape_truncated(query, QUERY_LIMIT)
+            header = f"🔍 <b>Найдено по запросу «{escaped_query}»"
+            if page > 1:
+                header += f", страница {page}"
+            messages = render_events(events, header + ":</b>\n\n")
+            
+            if has_more:
+                footer = (f"Следующая страница: /find {escaped_query} "
+                          f"{page + 1}")
+                if message_length(messages[-1]) + message_length(footer) > \
+                        MESSAGE_LIMIT:
+                    messages.append(footer)
+                else:
+                    messages[-1] += footer
+            
+            for text in messages:
+                await update.message.reply_text(text, parse_mode='HTML')
+        
+        except Exception as e:
+            logger.error(f"Error searching events: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при поиске событий.")
+        
+        return ConversationHandler.END
+    
+    async def free_slots(self, update: Update,
+                         context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /free."""
+        user_id = update.effective_user.id
+        date_str = parse_date(' '.join(context.args or ['сегодня']))
+        
+        if date_str is None:
+            await update.message.reply_text(
+                "❌ Неверный формат даты. Используйте ГГГГ-ММ-ДД\n"
+                "Пример: /free 2025-12-15 или /free завтра"
+            )
+            return ConversationHandler.END
+        
+        day = datetime.strptime(date_str, '%Y-%m-%d')
+        window_start, window_end = day + FREE_DAY_START, day + FREE_DAY_END
+        
+        try:
+            busy = self.calendar.get_busy_intervals(user_id, window_start,
+                                                    window_end)
+            tree = IntervalTree(
+                Interval(row['starts_at'], row['ends_at'], row['id'])
+                for row in busy
+            )
+            slots = tree.free_slots(window_start, window_end, FREE_MIN_SLOT)
+            
+            if not slots:
+                await update.message.reply_text(
+                    f"📭 На {date_str} свободного времени нет.")
+                return ConversationHandler.END
+            
+            lines = [f"🕒 Свободное время на {date_str}:"]
+            lines.extend(
+                f"• {start:%H:%M} - {end:%H:%M}" for start, end in slots
+            )
+            await update.message.reply_text('\n'.join(lines))
+        
+        except Exception as e:
+            logger.error(f"Error computing free slots: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при поиске свободного времени.")
+        
+        return ConversationHandler.END
+    
+    @staticmethod
+    def _conflicts_text(conflicts):
+        """Текст предупреждения о пересекающихся событиях."""
+        lines = ["⚠️ Время пересекается с событиями:"]
+        for event in conflicts:
+            duration = event['duration_minutes'] or DEFAULT_DURATION_MINUTES
+            lines.append(
+                f"🆔 {event['id']} {event['event_name']} - "
+                f"{event['event_date']} {str(event['event_time'])[:5]} "
+                f"({duration} мин)"
+            )
+        return '\n'.join(lines)
+    
+    async def stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /stats (только для администраторов)."""
+        if not self.is_admin(update):
+            await update.message.reply_text(
+                "❌ Неизвестная команда. Используйте /help для списка команд."
+            )
+            return ConversationHandler.END
+        
+        try:
+            days = self.calendar.get_daily_stats(days=7)
+            
+            lines = ["📊 <b>Статистика за 7 дней:</b>\n"]
+            if not days:
+                lines.append("Нет данных.")
+            for row in days:
+                lines.append(
+                    f"{row['day']}: создано {row['events_created']}, "
+                    f"удалено {row['events_deleted']}, "
+                    f"активных пользователей {row['active_users']}"
                 )
-                if event.get('event_time'):
-                    events_text += f" ⏰ {event['event_time']}"
-                if event.get('event_details'):
-                    events_text += f"\n📋 {event['event_details']}"
-                events_text += "\n" + "-" * 30 + "\n"
             
-            # Разбиваем сообщение если оно слишком длинное.
-            if len(events_text) > 4096:
-                for i in range(0, len(events_text), 4096):
-                    await update.message.reply_text(
-                        events_text[i:i + 4096],
-                        parse_mode='HTML'
+            if context.args and context.args[0].isdigit():
+                user_stats = self.calendar.get_user_stats(
+                    int(context.args[0]))
+                if user_stats:
+                    last_activity = user_stats['last_activity']
+                    lines.append(
+                        f"\n👤 {user_stats['user_id']}: "
+                        f"{user_stats['event_count']} событий, "
+                        f"активность {last_activity:%Y-%m-%d %H:%M}"
                     )
+                else:
+                    lines.append(f"\n👤 {context.args[0]}: нет данных")
+            
+            if self.throttle:
+                # Счетчики в памяти процесса, обработавшего команду.
+                lines.append(
+                    f"\n🚦 Флуд-контроль: отброшено "
+                    f"{self.throttle.dropped_updates} обновлений, "
+                    f"заглушено {self.throttle.mutes} раз"
+                )
+            
+            await update.message.reply_text('\n'.join(lines),
+                                            parse_mode='HTML')
+        
+        except Exception as e:
+            logger.error(f"Error getting stats: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при получении статистики.")
+        
+        return ConversationHandler.END
+    
+    async def profile(self, update: Update,
+                      context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /profile (только для администраторов).
+        
+        /profile 30 - cProfile на 30 секунд; /profile sample 60 -
+        сэмплирование стеков; /profile updates 500 - до 500 обновлений;
+        /profile stop - завершить досрочно.
+        """
+        if not self.is_admin(update) or self.profiler is None:
+            await update.message.reply_text(
+                "❌ Неизвестная команда. Используйте /help для списка команд."
+            )
+            return ConversationHandler.END
+        
+        args = [arg.lower() for arg in context.args or []]
+        if 'stop' in args:
+            if self.profiler.session is None:
+                await update.message.reply_text(
+                    "ℹ️ Профилирование не запущено.")
             else:
-                await update.message.reply_text(events_text, parse_mode='HTML')
+                await self.profiler.stop(context.application)
+            return ConversationHandler.END
+        
+        mode, seconds, max_updates = 'cprofile', None, None
+        for previous, arg in zip([None] + args, args):
+            if arg in PROFILE_MODES:
+                mode = arg
+            elif arg.isdigit() and previous == 'updates':
+                max_updates = int(arg)
+            elif arg.isdigit():
+                seconds = int(arg)
+        if seconds is None:
+            # Окно по числу обновлений ограничено только max_seconds.
+            seconds = self.profiler.max_seconds if max_updates else 30
+        
+        if not self.profiler.start(context.application,
+                                   update.effective_chat.id, mode, seconds,
+                                   max_updates):
+            await update.message.reply_text(
+                "⏳ Профилирование уже идет. /profile stop - завершить.")
+            return ConversationHandler.END
+        
+        limit = f"{self.profiler.session.seconds} с"
+        if max_updates:
+            limit += f" или {max_updates} обновлений"
+        await update.message.reply_text(
+            f"📈 Профилирование ({mode}) запущено: до {limit}.")
+        return ConversationHandler.END
+    
+    def _notify_group(self, context: ContextTypes.DEFAULT_TYPE, event,
+                      text):
+        """Уведомляет участников, если событие в общем календаре."""
+        if self.notifier and event and event['calendar_id']:
+            self.notifier.notify(
+                context.application,
+                {'id': event['calendar_id'],
+                 'title': event['calendar_title']},
+                event['user_id'], text)
+    
+    async def _group_add(self, update: Update,
+                         context: ContextTypes.DEFAULT_TYPE, quick_event):
+        """Создание события /add в общем календаре группового чата."""
+        user_id = update.effective_user.id
+        
+        try:
+            calendar = self.calendar.get_chat_calendar(
+                update.effective_chat.id, user_id)
+            if calendar is None:
+                await update.message.reply_text(
+                    "❌ У этого чата нет общего календаря. "
+                    "Создайте его командой /group_calendar."
+                )
+                return ConversationHandler.END
+            
+            # Автор события становится участником календаря.
+            self.calendar.join_calendar(calendar['id'], user_id)
+            event_id = self.calendar.create_event(
+                user_id=user_id,
+                event_name=quick_event.name,
+                event_date=quick_event.date,
+                event_time=quick_event.time,
+                event_details=quick_event.details,
+                duration_minutes=quick_event.duration,
+                calendar_id=calendar['id']
+            )
+            
+            summary = f"{quick_event.name} - {quick_event.date}"
+            if quick_event.time:
+                summary += f" {quick_event.time}"
+            await update.message.reply_text(
+                f"✅ Событие {event_id} добавлено в общий календарь: "
+                f"{summary}"
+            )
+            if self.notifier:
+                self.notifier.notify(context.application, calendar, user_id,
+                                     f"➕ {summary}")
         
         except Exception as e:
-            logger.error(f"Error getting events: {e}")
+            logger.error(f"Error creating group event: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при создании события. Попробуйте еще раз."
+            )
+        
+        return ConversationHandler.END
+    
+    async def group_calendar(self, update: Update,
+                             context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /group_calendar.
+        
+        В групповом чате создает общий календарь, в личном - показывает
+        календари, в которых состоит пользователь.
+        """
+        user_id = update.effective_user.id
+        chat = update.effective_chat
+        
+        try:
+            if chat.type in GROUP_CHAT_TYPES:
+                calendar = self.calendar.create_calendar(
+                    chat.id, chat.title or str(chat.id), user_id)
+                await update.message.reply_text(
+                    f"👥 Общий календарь «{calendar['title']}» готов.\n"
+                    "Участники присоединяются командой /join, события "
+                    "добавляются командой /add."
+                )
+                return ConversationHandler.END
+            
+            calendars = self.calendar.get_user_calendars(user_id)
+            if not calendars:
+                await update.message.reply_text(
+                    "📭 Вы не состоите в общих календарях. Добавьте бота в "
+                    "групповой чат и выполните там /group_calendar."
+                )
+                return ConversationHandler.END
+            
+            lines = ["👥 <b>Ваши общие календари:</b>"]
+            lines.extend(f"• {html.escape(calendar['title'], quote=False)}"
+                         for calendar in calendars)
+            await update.message.reply_text('\n'.join(lines),
+                                            parse_mode='HTML')
+        
+        except Exception as e:
+            logger.error(f"Error handling group calendar: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при работе с общим календарем.")
+        
+        return ConversationHandler.END
+    
+    async def _chat_calendar(self, update: Update):
+        """Календарь текущего группового чата или None с ответом."""
+        if update.effective_chat.type not in GROUP_CHAT_TYPES:
+            await update.message.reply_text(
+                "❌ Команда доступна только в групповом чате.")
+            return None
+        
+        calendar = self.calendar.get_chat_calendar(
+            update.effective_chat.id, update.effective_user.id)
+        if calendar is None:
+            await update.message.reply_text(
+                "❌ У этого чата нет общего календаря. "
+                "Создайте его командой /group_calendar."
+            )
+        return calendar
+    
+    async def join_calendar(self, update: Update,
+                            context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /join."""
+        try:
+            calendar = await self._chat_calendar(update)
+            if calendar is None:
+                return ConversationHandler.END
+            
+            if self.calendar.join_calendar(calendar['id'],
+                                           update.effective_user.id):
+                text = f"✅ Вы участник календаря «{calendar['title']}»."
+            else:
+                text = "ℹ️ Вы уже участник этого календаря."
+            await update.message.reply_text(text)
+        
+        except Exception as e:
+            logger.error(f"Error joining calendar: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при работе с общим календарем.")
+        
+        return ConversationHandler.END
+    
+    async def leave_calendar(self, update: Update,
+                             context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /leave."""
+        try:
+            calendar = await self._chat_calendar(update)
+            if calendar is None:
+                return ConversationHandler.END
+            
+            if self.calendar.leave_calendar(calendar['id'],
+                                            update.effective_user.id):
+                text = f"👋 Вы вышли из календаря «{calendar['title']}»."
+            else:
+                text = "ℹ️ Вы не участник этого календаря."
+            await update.message.reply_text(text)
+        
+        except Exception as e:
+            logger.error(f"Error leaving calendar: {e}")
+            await update.message.reply_text(
+                "❌ Произошла ошибка при работе с общим календарем.")
+        
+        return ConversationHandler.END
+    
+    async def group_events(self, update: Update,
+                           context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /group_events."""
+        try:
+            calendar = await self._chat_calendar(update)
+            if calendar is None:
+                return ConversationHandler.END
+            
+            events = self.calendar.get_calendar_events(
+                calendar['id'], update.effective_user.id)
+            if not events:
+                await update.message.reply_text(
+                    "📭 В общем календаре пока нет событий.")
+                return ConversationHandler.END
+            
+            title = html.escape(calendar['title'], quote=False)
+            for text in render_events(events, f"👥 <b>{title}:</b>\n\n"):
+                await update.message.reply_text(text, parse_mode='HTML')
+        
+        except Exception as e:
+            logger.error(f"Error getting group events: {e}")
             await update.message.reply_text(
                 "❌ Произошла ошибка при получении событий.")
         
@@ -312,7 +807,8 @@ class CommandHandlers:
             '1': ('event_name', "Введите новое название события:"),
             '2': ('event_date', "Введите новую дату в формате ГГГГ-ММ-ДД:"),
             '3': ('event_time',
-                  "Введите новое время в формате ЧЧ:ММ (или '-' чтобы удалить):"),
+                  "Введите новое время в формате ЧЧ:ММ или ЧЧ:ММ-ЧЧ:ММ "
+                  "(или '-' чтобы удалить):"),
             '4': ('event_details',
                   "Введите новое описание (или '-' чтобы удалить):")
         }
@@ -339,29 +835,30 @@ class CommandHandlers:
         
         # Валидация в зависимости от поля.
         if field == 'event_date':
-            if not DATE_PATTERN.match(new_value):
+            parsed_date = parse_date(new_value)
+            if parsed_date is None and not DATE_PATTERN.match(new_value):
                 await update.message.reply_text(
                     "❌ Неверный формат даты. Используйте ГГГГ-ММ-ДД\n"
                     "Попробуйте еще раз:"
                 )
                 return UserState.AWAITING_EDIT_VALUE.value
-            try:
-                datetime.strptime(new_value, '%Y-%m-%d')
-            except ValueError:
+            if parsed_date is None:
                 await update.message.reply_text(
                     "❌ Несуществующая дата. Попробуйте еще раз:"
                 )
                 return UserState.AWAITING_EDIT_VALUE.value
+            new_value = parsed_date
         
         elif field == 'event_time' and new_value != '-':
             if not TIME_PATTERN.match(new_value):
                 await update.message.reply_text(
-                    "❌ Неверный формат времени. Используйте ЧЧ:ММ\n"
+                    "❌ Неверный формат времени. Используйте ЧЧ:ММ "
+                    "или ЧЧ:ММ-ЧЧ:ММ\n"
                     "Попробуйте еще раз (или '-' чтобы удалить время):"
                 )
                 return UserState.AWAITING_EDIT_VALUE.value
             try:
-                datetime.strptime(new_value, '%H:%M')
+                new_value, duration = parse_time_range(new_value)
             except ValueError:
                 await update.message.reply_text(
                     "❌ Неверное время. Попробуйте еще раз:"
@@ -372,6 +869,30 @@ class CommandHandlers:
         update_data = {
             field: None if new_value == '-' else new_value
         }
+        # Без времени окончания сохраняется прежняя длительность: с ней
+        # же проверяются пересечения ниже.
+        if field == 'event_time' and new_value != '-' and duration:
+            update_data['duration_minutes'] = duration
+        
+        event = self.calendar.get_event(user_id, event_data.event_id)
+        
+        # Проверяем пересечения с другими событиями.
+        if field in ('event_date', 'event_time') and new_value != '-':
+            if event:
+                conflicts = self.calendar.find_conflicts(
+                    user_id,
+                    update_data.get('event_date', event['event_date']),
+                    update_data.get('event_time', event['event_time']),
+                    update_data.get('duration_minutes',
+                                    event['duration_minutes']),
+                    exclude_event_id=event_data.event_id
+                )
+                if conflicts:
+                    await update.message.reply_text(
+                        self._conflicts_text(conflicts) +
+                        "\nВведите другое значение:"
+                    )
+                    return UserState.AWAITING_EDIT_VALUE.value
         
         try:
             success = self.calendar.edit_event(
@@ -384,6 +905,10 @@ class CommandHandlers:
                 await update.message.reply_text(
                     f"✅ Событие успешно обновлено!"
                 )
+                if event:
+                    name = update_data.get('event_name') or event['event_name']
+                    self._notify_group(context, event,
+                                       f"✏️ {name} - изменено")
             else:
                 await update.message.reply_text(
                     "❌ Не удалось обновить событие."
@@ -445,6 +970,8 @@ class CommandHandlers:
                 await update.message.reply_text(
                     f"✅ Событие {event_id} успешно удалено!"
                 )
+                self._notify_group(context, event,
+                                   f"🗑 {event['event_name']} - удалено")
             else:
                 await update.message.reply_text(
                     "❌ Не удалось удалить событие."
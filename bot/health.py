@@ -0,0 +1,69 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class HealthState:
+    """Флаги liveness/readiness процесса бота"""
+    
+    def __init__(self):
+        self._ready = threading.Event()
+        self.checks = []
+    
+    def set_ready(self):
+        self._ready.set()
+    
+    def set_not_ready(self):
+        self._ready.clear()
+    
+    def is_ready(self):
+        """Готов, если запуск завершен и все проверки проходят"""
+        if not self._ready.is_set():
+            return False
+        for check in self.checks:
+            try:
+                if not check():
+                    return False
+            except Exception as e:
+                logger.warning(f"Readiness check failed: {e}")
+                return False
+        return True
+
+
+def _make_handler(state: HealthState):
+    class HealthHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/healthz':
+                self._reply(200, b'ok')
+            elif self.path == '/readyz':
+                if state.is_ready():
+                    self._reply(200, b'ready')
+                else:
+                    self._reply(503, b'not ready')
+            else:
+                self._reply(404, b'not found')
+        
+        def _reply(self, code, body):
+            self.send_response(code)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            # Пробы приходят каждые несколько секунд - не засоряем лог.
+            pass
+    
+    return HealthHandler
+
+
+def start_health_server(state: HealthState, port):
+    """Запускает HTTP-сервер проб (/healthz, /readyz) в фоновом потоке"""
+    server = ThreadingHTTPServer(('0.0.0.0', port), _make_handler(state))
+    thread = threading.Thread(target=server.serve_forever,
+                              name='health-server', daemon=True)
+    thread.start()
+    logger.info(f"Health endpoints on port {port}")
+    return server
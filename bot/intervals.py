@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+
+@dataclass(order=True)
+class Interval:
+    """Полуоткрытый интервал времени [start, end)"""
+    start: datetime
+    end: datetime
+    payload: Any = field(default=None, compare=False)
+
+
+class IntervalTree:
+    """Статическое дерево интервалов для расчетов в рамках одного запроса.
+    
+    Интервалы хранятся отсортированными по началу; неявное сбалансированное
+    дерево над массивом дополнено максимумом концов в каждом поддереве,
+    поэтому поиск пересечений отсекает ветви, которые не могут пересекаться
+    с запросом, и работает за O(log n + k).
+    """
+    
+    def __init__(self, intervals=()):
+        self._items: List[Interval] = sorted(
+            i for i in intervals if i.start < i.end
+        )
+        self._max_end: List[Optional[datetime]] = [None] * len(self._items)
+        self._build(0, len(self._items))
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def _build(self, lo, hi):
+        """Заполняет максимумы концов для поддерева [lo, hi)"""
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        max_end = self._items[mid].end
+        for child in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child is not None and child > max_end:
+                max_end = child
+        self._max_end[mid] = max_end
+        return max_end
+    
+    def overlapping(self, start: datetime, end: datetime) -> List[Interval]:
+        """Возвращает интервалы, пересекающиеся с [start, end)"""
+        result = []
+        self._collect(0, len(self._items), start, end, result)
+        return result
+    
+    def _collect(self, lo, hi, start, end, result):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self._max_end[mid] <= start:
+            return
+        self._collect(lo, mid, start, end, result)
+        # Правее mid интервалы начинаются еще позже.
+        if self._items[mid].start < end:
+            if self._items[mid].end > start:
+                result.append(self._items[mid])
+            self._collect(mid + 1, hi, start, end, result)
+    
+    def free_slots(self, start: datetime, end: datetime,
+                   min_duration: timedelta = timedelta(0)
+                   ) -> List[Tuple[datetime, datetime]]:
+        """Возвращает свободные промежутки внутри [start, end)"""
+        slots = []
+        cursor = start
+        for interval in self.overlapping(start, end):
+            if interval.start > cursor and \
+                    interval.start - cursor >= min_duration:
+                slots.append((cursor, min(interval.start, end)))
+            cursor = max(cursor, interval.end)
+        if end > cursor and end - cursor >= min_duration:
+            slots.append((cursor, end))
+        return slots
@@ -1,10 +1,7 @@
 import logging
 import os
 from dotenv import load_dotenv
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
-from bot.database import Database, Calendar
-from bot.states import UserStateManager
-from bot.handlers import CommandHandlers
+from bot.health import HealthState, start_health_server
 
 # Загрузка переменных окружения.
 load_dotenv()
@@ -17,27 +14,121 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def main():
-    """Основная функция запуска бота."""
+def build_application(db, name='bot', builder=None, accepts=None,
+                      health=None):
+    """Создает приложение бота со всеми обработчиками поверх db.
+    
+    accepts - фильтр user_id для push-уведомлений (в режиме воркеров
+    каждый воркер уведомляет только пользователей своего шарда).
+    health - состояние проб: приложение готово после post_init.
+    """
+    # Импорты здесь, а не в начале модуля: процесс сначала поднимает
+    # пробы и соединения с БД, а тяжелые модули грузит потом.
+    from telegram import Update
+    from telegram.ext import (Application, CommandHandler, MessageHandler,
+                              TypeHandler, filters)
+    from bot.changefeed import ChangeNotifier
+    from bot.database import Calendar
+    from bot.dedup import UpdateDeduplicator
+    from bot.handlers import CommandHandlers
+    from bot.notifications import GroupNotifier
+    from bot.profiling import BotProfiler, LoopLagMonitor
+    from bot.states import UserStateManager
+    from bot.throttle import UpdateThrottle
     
-    # Инициализация базы данных.
-    db = Database()
     calendar = Calendar(db)
     state_manager = UserStateManager(db)
-    handlers = CommandHandlers(calendar, state_manager)
+    admin_ids = {int(user_id) for user_id in
+                 os.getenv('BOT_ADMIN_IDS', '').split(',') if user_id.strip()}
+    group_notifier = GroupNotifier(
+        calendar, delay=float(os.getenv('GROUP_NOTIFY_DELAY', '2')))
+    
+    # Задержка event loop пишется в лог постоянно (одно пробуждение в
+    # interval), профилирование включается командой /profile.
+    lag_threshold_ms = int(os.getenv('LOOP_LAG_THRESHOLD_MS', '200'))
+    lag_monitor = None
+    if lag_threshold_ms:
+        lag_monitor = LoopLagMonitor(threshold=lag_threshold_ms / 1000)
+    profiler = BotProfiler(
+        os.getenv('PROFILE_DIR', 'profiles'), name=name,
+        max_seconds=int(os.getenv('PROFILE_MAX_SECONDS', '300')),
+        slow_callback_ms=int(os.getenv('PROFILE_SLOW_CALLBACK_MS', '100')),
+        lag_monitor=lag_monitor
+    )
+    deduplicator = UpdateDeduplicator(db, name=name)
+    throttle = UpdateThrottle(
+        burst=int(os.getenv('THROTTLE_BURST', '10')),
+        refill_rate=float(os.getenv('THROTTLE_RATE', '1')),
+        mute_seconds=int(os.getenv('THROTTLE_MUTE_SECONDS', '60')),
+        max_users=int(os.getenv('THROTTLE_MAX_USERS', '10000'))
+    )
+    handlers = CommandHandlers(calendar, state_manager, admin_ids,
+                               group_notifier, profiler, throttle)
+    
+    # Push-уведомления об изменениях событий через API.
+    notifier = None
+    if os.getenv('BOT_PUSH_CHANGES', 'False') == 'True':
+        notifier = ChangeNotifier(db.connection_string, accepts,
+                                  group_notifier, calendar)
+    
+    async def post_init(application):
+        if notifier:
+            await notifier.start(application)
+        if lag_monitor:
+            await lag_monitor.start(application)
+        if health:
+            health.set_ready()
+    
+    async def post_shutdown(application):
+        if health:
+            health.set_not_ready()
+        if notifier:
+            await notifier.stop(application)
+        if lag_monitor:
+            await lag_monitor.stop(application)
+        await profiler.stop(application)
+        await group_notifier.shutdown(application)
+        await deduplicator.shutdown(application)
     
     # Создание приложения.
-    application = Application.builder().token(os.getenv('BOT_TOKEN')).build()
+    application = (
+        (builder or Application.builder())
+        .token(os.getenv('BOT_TOKEN'))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
+    
+    # Отбрасываем повторно доставленные обновления до всех обработчиков:
+    # проверка в памяти, и повтор не расходует токены флуд-контроля.
+    application.add_handler(TypeHandler(Update, deduplicator.check),
+                            group=-2)
+    
+    # Ограничиваем флуд раньше обработчиков команд и БД.
+    application.add_handler(TypeHandler(Update, throttle.check), group=-1)
     
     # Регистрация обработчиков команд
     application.add_handler(CommandHandler("start", handlers.start))
     application.add_handler(CommandHandler("help", handlers.help))
     application.add_handler(CommandHandler("my_events", handlers.my_events))
+    application.add_handler(CommandHandler("find", handlers.find_events))
+    application.add_handler(CommandHandler("free", handlers.free_slots))
     application.add_handler(CommandHandler("cancel", handlers.cancel))
+    application.add_handler(CommandHandler("stats", handlers.stats))
+    application.add_handler(CommandHandler("profile", handlers.profile))
+    
+    # Общие календари групповых чатов.
+    application.add_handler(
+        CommandHandler("group_calendar", handlers.group_calendar))
+    application.add_handler(CommandHandler("join", handlers.join_calendar))
+    application.add_handler(CommandHandler("leave", handlers.leave_calendar))
+    application.add_handler(
+        CommandHandler("group_events", handlers.group_events))
     
     # Регистрация обработчиков с пошаговой логикой.
     application.add_handler(
         CommandHandler("create_event", handlers.create_event_start))
+    application.add_handler(CommandHandler("add", handlers.quick_add))
     application.add_handler(
         CommandHandler("edit_event", handlers.edit_event_start))
     application.add_handler(
@@ -46,6 +137,35 @@ def main():
     # Обработчик текстовых сообщений.
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND,
                                            handlers.handle_message))
+    return application
+
+
+def main():
+    """Основная функция запуска бота."""
+    
+    # Пробы поднимаются первыми: liveness отвечает сразу, readiness -
+    # после подключения к БД и запуска приложения.
+    health = HealthState()
+    health_port = int(os.getenv('HEALTH_PORT', '8080'))
+    if health_port:
+        start_health_server(health, health_port)
+    
+    # Несколько процессов: фронт опрашивает Telegram и раскладывает
+    # обновления по воркерам по хешу user_id.
+    num_workers = int(os.getenv('BOT_WORKERS', '1'))
+    if num_workers > 1:
+        from bot.workers import run_sharded
+        logger.info(f"Бот запущен с {num_workers} воркерами...")
+        run_sharded(os.getenv('BOT_TOKEN'), num_workers, health)
+        return
+    
+    # Инициализация базы данных: соединение с повторами и прогрев пула.
+    from telegram import Update
+    from bot.database import Database
+    db = Database()
+    db.warm_up()
+    health.checks.append(db.ping)
+    application = build_application(db, health=health)
     
     # Запуск бота.
     logger.info("Бот запущен...")
@@ -54,4 +174,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-    
\ No newline at end of file
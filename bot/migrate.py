@@ -0,0 +1,33 @@
+import logging
+from dotenv import load_dotenv
+from bot.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Создает и обновляет схему БД"""
+    db = Database(auto_migrate=False)
+    try:
+        db.init_schema()
+        logger.info("Схема базы данных обновлена")
+    finally:
+        db.close()
+
+
+def main():
+    """Одноразовая команда: применяет схему БД и завершается.
+    
+    Запуск: python -m bot.migrate. После нее бот можно стартовать с
+    DB_AUTO_MIGRATE=False, не выполняя DDL при каждом рестарте.
+    """
+    load_dotenv()
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    migrate()
+
+
+if __name__ == '__main__':
+    main()
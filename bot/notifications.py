@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class GroupNotifier:
+    """Рассылает участникам общего календаря уведомления пачками.
+
+    Изменения календаря копятся delay секунд и уходят каждому участнику
+    одним сообщением. Участники читаются из БД страницами, сообщения
+    отправляются порциями по batch_size в секунду, чтобы не упереться
+    в ограничения Telegram на частоту отправки.
+    """
+    
+    def __init__(self, calendar, delay=2.0, batch_size=25, page_size=1000):
+        self.calendar = calendar
+        self.delay = delay
+        self.batch_size = batch_size
+        self.page_size = page_size
+        # calendar_id -> [(автор, текст)] еще не отправленных изменений.
+        self._pending = defaultdict(list)
+        self._titles = {}
+        self._tasks = {}
+    
+    def notify(self, application, calendar, author_id, text):
+        """Ставит уведомление об изменении календаря в очередь"""
+        calendar_id = calendar['id']
+        self._pending[calendar_id].append((author_id, text))
+        self._titles[calendar_id] = calendar['title']
+        if calendar_id not in self._tasks:
+            self._tasks[calendar_id] = application.create_task(
+                self._flush_later(application, calendar_id))
+    
+    async def shutdown(self, application):
+        """Отправляет накопленные уведомления без ожидания"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._tasks.clear()
+        for calendar_id in list(self._pending):
+            await self._flush(application, calendar_id)
+    
+    async def _flush_later(self, application, calendar_id):
+        await asyncio.sleep(self.delay)
+        self._tasks.pop(calendar_id, None)
+        await self._flush(application, calendar_id)
+    
+    async def _flush(self, application, calendar_id):
+        changes = self._pending.pop(calendar_id, [])
+        title = self._titles.pop(calendar_id, '')
+        if not changes:
+            return
+        
+        batch = []
+        for user_id in self.calendar.iter_member_ids(calendar_id,
+                                                     self.page_size):
+            # Автор уже получил ответ в чате - свои изменения не шлем.
+            lines = [text for author_id, text in changes
+                     if author_id != user_id]
+            if not lines:
+                continue
+            batch.append(self._send(application, user_id,
+                                    f"👥 {title}\n" + '\n'.join(lines)))
+            if len(batch) >= self.batch_size:
+                await asyncio.gather(*batch)
+                batch = []
+                await asyncio.sleep(1)
+        if batch:
+            await asyncio.gather(*batch)
+    
+    @staticmethod
+    async def _send(application, user_id, text):
+        try:
+            await application.bot.send_message(chat_id=user_id, text=text)
+        except Exception as e:
+            # Пользователь мог не начинать диалог с ботом.
+            logger.warning(f"Error notifying {user_id}: {e}")
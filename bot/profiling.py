@@ -0,0 +1,266 @@
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from telegram import Update
+from telegram.ext import TypeHandler
+
+logger = logging.getLogger(__name__)
+
+# Группа обработчика, считающего обновления сессии: после всех остальных.
+COUNT_HANDLER_GROUP = 100
+PROFILE_MODES = ('cprofile', 'sample')
+
+
+def frame_label(code):
+    """Имя кадра для свернутого стека (без ';' - это разделитель)"""
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame):
+    """Стек кадра в формате flamegraph: от корня к листу через ';'"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Сэмплирующий профилировщик потока.
+
+    Отдельный поток раз в interval секунд снимает стек профилируемого
+    потока и считает одинаковые стеки. Результат - свернутые стеки,
+    которые принимают flamegraph.pl и speedscope.
+    """
+    
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='stack-sampler')
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+    
+    def write(self, path):
+        with open(path, 'w') as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+class _SlowCallbackCollector(logging.Handler):
+    """Собирает предупреждения asyncio о медленных callback"""
+    
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+    
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class LoopLagMonitor:
+    """Измеряет задержку event loop бота.
+
+    Задача раз в interval секунд засыпает и сравнивает фактическое время
+    пробуждения с ожидаемым: разница - сколько loop был занят чужим
+    синхронным кодом. Задержки больше threshold пишутся в лог.
+    """
+    
+    def __init__(self, interval=1.0, threshold=0.2):
+        self.interval = interval
+        self.threshold = threshold
+        self._task = None
+        self.max_lag = 0.0
+        self.lag_warnings = 0
+    
+    async def start(self, application=None):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self, application=None):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    def reset(self):
+        """Сбрасывает накопленные значения (начало окна профилирования)"""
+        self.max_lag = 0.0
+        self.lag_warnings = 0
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - started - self.interval
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.lag_warnings += 1
+                logger.warning(f"Event loop lag {lag * 1000:.0f} ms")
+
+
+class ProfileSession:
+    """Одно окно профилирования: по времени и/или числу обновлений"""
+    
+    def __init__(self, mode, path_prefix, seconds, max_updates=None,
+                 chat_id=None):
+        self.mode = mode
+        self.path_prefix = path_prefix
+        self.seconds = seconds
+        self.max_updates = max_updates
+        self.chat_id = chat_id
+        self.updates = 0
+        self.slow_callbacks = _SlowCallbackCollector()
+        self.timer = None
+        self.handler = None
+        self.loop_debug = False
+        self._profile = None
+        self._sampler = None
+    
+    def start(self):
+        if self.mode == 'sample':
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+    
+    def stop(self):
+        """Останавливает сбор и возвращает (пути файлов, сводка)"""
+        if self._sampler is not None:
+            self._sampler.stop()
+            path = f"{self.path_prefix}.collapsed"
+            self._sampler.write(path)
+            top = Counter()
+            for stack, count in self._sampler.stacks.items():
+                top[stack.rsplit(';', 1)[-1]] += count
+            summary = '\n'.join(f"{count} {label}"
+                                for label, count in top.most_common(10))
+            return [path], summary
+        
+        self._profile.disable()
+        path = f"{self.path_prefix}.pstats"
+        self._profile.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(self._profile, stream=output).sort_stats(
+            'cumulative').print_stats(10)
+        return [path], output.getvalue()
+
+
+class BotProfiler:
+    """Профилирование бота по команде администратора.
+
+    Пока сессии нет, профилировщик ничего не делает: обработчик счета
+    обновлений, debug-режим asyncio и сбор стеков включаются только на
+    время окна. Результаты пишутся в directory: .pstats (cProfile) или
+    .collapsed (сэмплирование), а также .loop.txt с задержками loop и
+    медленными callback.
+    """
+    
+    def __init__(self, directory, name='bot', max_seconds=300,
+                 slow_callback_ms=100, lag_monitor=None):
+        self.directory = directory
+        self.name = name
+        self.max_seconds = max_seconds
+        self.slow_callback_ms = slow_callback_ms
+        self.lag_monitor = lag_monitor
+        self.session = None
+    
+    def start(self, application, chat_id, mode='cprofile', seconds=30,
+              max_updates=None):
+        """Открывает окно профилирования; False, если уже идет сессия"""
+        if self.session is not None:
+            return False
+        
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        session = ProfileSession(
+            mode, os.path.join(self.directory, f"{self.name}-{stamp}"),
+            min(seconds, self.max_seconds), max_updates, chat_id)
+        
+        session.handler = TypeHandler(Update, self._count_update)
+        application.add_handler(session.handler, group=COUNT_HANDLER_GROUP)
+        
+        # Debug-режим asyncio сообщает о callback дольше
+        # slow_callback_duration; вне окна он выключен.
+        loop = asyncio.get_running_loop()
+        session.loop_debug = loop.get_debug()
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.slow_callback_ms / 1000
+        logging.getLogger('asyncio').addHandler(session.slow_callbacks)
+        if self.lag_monitor:
+            self.lag_monitor.reset()
+        
+        session.timer = loop.call_later(
+            session.seconds,
+            lambda: application.create_task(self.stop(application)))
+        self.session = session
+        session.start()
+        return True
+    
+    async def stop(self, application):
+        """Закрывает окно, сохраняет результаты и сообщает администратору"""
+        session, self.session = self.session, None
+        if session is None:
+            return
+        
+        paths, summary = session.stop()
+        session.timer.cancel()
+        application.remove_handler(session.handler, group=COUNT_HANDLER_GROUP)
+        asyncio.get_running_loop().set_debug(session.loop_debug)
+        logging.getLogger('asyncio').removeHandler(session.slow_callbacks)
+        
+        loop_path = f"{session.path_prefix}.loop.txt"
+        with open(loop_path, 'w') as output:
+            if self.lag_monitor:
+                output.write(
+                    f"max lag: {self.lag_monitor.max_lag * 1000:.0f} ms\n"
+                    f"lag warnings: {self.lag_monitor.lag_warnings}\n")
+            output.write(f"updates: {session.updates}\n")
+            output.write(f"slow callbacks: "
+                         f"{len(session.slow_callbacks.messages)}\n")
+            for message in session.slow_callbacks.messages:
+                output.write(f"{message}\n")
+        paths.append(loop_path)
+        logger.info(f"Profile saved: {', '.join(paths)}")
+        
+        try:
+            await application.bot.send_message(
+                chat_id=session.chat_id,
+                text=(f"📈 Профилирование {self.name} завершено "
+                      f"({session.updates} обновлений).\n"
+                      + '\n'.join(paths) + "\n\n" + summary)[:4096]
+            )
+        except Exception as e:
+            logger.error(f"Error sending profile summary: {e}")
+    
+    async def _count_update(self, update, context):
+        session = self.session
+        if session is None:
+            return
+        session.updates += 1
+        if session.max_updates and session.updates == session.max_updates:
+            # Останавливаем после текущего обновления, а не посреди него.
+            context.application.create_task(
+                self.stop(context.application))
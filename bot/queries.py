@@ -0,0 +1,213 @@
+from typing import NamedTuple, Optional, Tuple
+
+# Колонки events, которые разрешено менять через Calendar.edit_event.
+EDITABLE_COLUMNS = ('event_name', 'event_date', 'event_time',
+                    'event_details', 'duration_minutes')
+
+
+class Query(NamedTuple):
+    """Именованный запрос, готовящийся на сервере один раз на соединение"""
+    name: str
+    sql: str
+    param_types: Tuple[str, ...] = ()
+    # Собственный statement_timeout, мс; None - таймаут соединения.
+    timeout_ms: Optional[int] = None
+    
+    @property
+    def prepare_sql(self):
+        types = f" ({', '.join(self.param_types)})" if self.param_types else ''
+        return f"PREPARE {self.name}{types} AS {self.sql}"
+    
+    @property
+    def execute_sql(self):
+        if not self.param_types:
+            return f"EXECUTE {self.name}"
+        placeholders = ', '.join(['%s'] * len(self.param_types))
+        return f"EXECUTE {self.name} ({placeholders})"
+
+
+_TSQUERY = ("(websearch_to_tsquery('russian', $1) || "
+            "websearch_to_tsquery('english', $1))")
+
+QUERIES = {query.name: query for query in (
+    Query('create_event', '''
+        INSERT INTO events (user_id, event_name, event_date, event_time,
+                            event_details, duration_minutes, calendar_id)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        RETURNING id
+    ''', ('bigint', 'varchar', 'date', 'time', 'text', 'integer',
+          'integer')),
+    
+    # Личные события плюс события общих календарей, где пользователь
+    # участник: join по calendar_members_user_idx и events_calendar_idx.
+    Query('get_user_events', '''
+        SELECT id, event_name, event_date, event_time, event_details,
+               NULL::varchar AS calendar_title
+        FROM events
+        WHERE user_id = $1 AND calendar_id IS NULL
+        UNION ALL
+        SELECT e.id, e.event_name, e.event_date, e.event_time,
+               e.event_details, c.title
+        FROM calendar_members m
+        JOIN calendars c ON c.id = m.calendar_id
+        JOIN events e ON e.calendar_id = m.calendar_id
+        WHERE m.user_id = $1
+        ORDER BY event_date, event_time
+    ''', ('bigint',), timeout_ms=5000),
+    
+    Query('search_events', f'''
+        SELECT id, event_name, event_date, event_time, event_details,
+               ts_rank_cd(search_vector, {_TSQUERY}) AS rank
+        FROM events
+        WHERE user_id = $2 AND search_vector @@ {_TSQUERY}
+        ORDER BY rank DESC, event_date, event_time
+        LIMIT $3 OFFSET $4
+    ''', ('text', 'bigint', 'bigint', 'bigint'), timeout_ms=3000),
+    
+    Query('search_events_exists', f'''
+        SELECT EXISTS (
+            SELECT 1 FROM events
+            WHERE user_id = $2 AND search_vector @@ {_TSQUERY}
+        ) AS found
+    ''', ('text', 'bigint'), timeout_ms=3000),
+    
+    Query('search_events_fuzzy', '''
+        SELECT id, event_name, event_date, event_time, event_details,
+               word_similarity($1, event_name) AS rank
+        FROM events
+        WHERE user_id = $2 AND $1 <% event_name
+        ORDER BY rank DESC, event_date, event_time
+        LIMIT $3 OFFSET $4
+    ''', ('text', 'bigint', 'bigint', 'bigint'), timeout_ms=3000),
+    
+    Query('find_conflicts', '''
+        SELECT id, event_name, event_date, event_time, duration_minutes
+        FROM events
+        WHERE user_id = $1
+          AND time_range && tsrange($2, $3)
+          AND id IS DISTINCT FROM $4
+        ORDER BY time_range
+    ''', ('bigint', 'timestamp', 'timestamp', 'integer')),
+    
+    Query('get_busy_intervals', '''
+        SELECT id, event_name,
+               lower(time_range) AS starts_at,
+               upper(time_range) AS ends_at
+        FROM events
+        WHERE user_id = $1 AND time_range && tsrange($2, $3)
+    ''', ('bigint', 'timestamp', 'timestamp')),
+    
+    Query('get_daily_stats', '''
+        SELECT day, events_created, events_deleted, active_users
+        FROM stats_daily
+        WHERE day > current_date - $1
+        ORDER BY day DESC
+    ''', ('integer',)),
+    
+    Query('get_user_stats', '''
+        SELECT user_id, event_count, last_activity
+        FROM stats_user_totals
+        WHERE user_id = $1
+    ''', ('bigint',)),
+    
+    Query('get_event', '''
+        SELECT e.id, e.user_id, e.event_name, e.event_date, e.event_time,
+               e.event_details, e.duration_minutes, e.created_at,
+               e.calendar_id, c.title AS calendar_title
+        FROM events e
+        LEFT JOIN calendars c ON c.id = e.calendar_id
+        WHERE e.user_id = $1 AND e.id = $2
+    ''', ('bigint', 'integer')),
+    
+    # Одно выражение на все разрешенные колонки: NULL - «не менять».
+    Query('update_event', '''
+        UPDATE events SET
+            event_name = COALESCE($3, event_name),
+            event_date = COALESCE($4, event_date),
+            event_time = COALESCE($5, event_time),
+            event_details = COALESCE($6, event_details),
+            duration_minutes = COALESCE($7, duration_minutes)
+        WHERE user_id = $1 AND id = $2
+    ''', ('bigint', 'integer', 'varchar', 'date', 'time', 'text', 'integer')),
+    
+    Query('delete_event', '''
+        DELETE FROM events
+        WHERE user_id = $1 AND id = $2
+    ''', ('bigint', 'integer')),
+    
+    Query('get_chat_calendar', '''
+        SELECT id, chat_id, title, owner_id
+        FROM calendars
+        WHERE chat_id = $1
+    ''', ('bigint',)),
+    
+    Query('get_calendar', '''
+        SELECT id, chat_id, title, owner_id
+        FROM calendars
+        WHERE id = $1
+    ''', ('integer',)),
+    
+    Query('create_calendar', '''
+        INSERT INTO calendars (chat_id, title, owner_id)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (chat_id) DO UPDATE SET title = EXCLUDED.title
+        RETURNING id, chat_id, title, owner_id
+    ''', ('bigint', 'varchar', 'bigint')),
+    
+    Query('add_calendar_member', '''
+        INSERT INTO calendar_members (calendar_id, user_id)
+        VALUES ($1, $2)
+        ON CONFLICT DO NOTHING
+    ''', ('integer', 'bigint')),
+    
+    Query('remove_calendar_member', '''
+        DELETE FROM calendar_members
+        WHERE calendar_id = $1 AND user_id = $2
+    ''', ('integer', 'bigint')),
+    
+    Query('get_user_calendars', '''
+        SELECT c.id, c.chat_id, c.title, c.owner_id
+        FROM calendar_members m
+        JOIN calendars c ON c.id = m.calendar_id
+        WHERE m.user_id = $1
+        ORDER BY c.title
+    ''', ('bigint',)),
+    
+    Query('get_calendar_events', '''
+        SELECT id, user_id, event_name, event_date, event_time,
+               event_details
+        FROM events
+        WHERE calendar_id = $1
+        ORDER BY event_date, event_time
+    ''', ('integer',), timeout_ms=5000),
+    
+    # Участники страницами по первичному ключу (keyset), без OFFSET.
+    Query('get_calendar_member_ids', '''
+        SELECT user_id
+        FROM calendar_members
+        WHERE calendar_id = $1 AND user_id > $2
+        ORDER BY user_id
+        LIMIT $3
+    ''', ('integer', 'bigint', 'integer')),
+    
+    Query('get_user_state', '''
+        SELECT state, event_data
+        FROM user_states
+        WHERE user_id = $1
+    ''', ('bigint',), timeout_ms=1000),
+    
+    Query('set_user_state', '''
+        INSERT INTO user_states (user_id, state, event_data, updated_at)
+        VALUES ($1, $2, $3, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_id)
+        DO UPDATE SET
+            state = EXCLUDED.state,
+            event_data = EXCLUDED.event_data,
+            updated_at = CURRENT_TIMESTAMP
+    ''', ('bigint', 'varchar', 'jsonb'), timeout_ms=1000),
+    
+    Query('clear_user_state', '''
+        DELETE FROM user_states
+        WHERE user_id = $1
+    ''', ('bigint',), timeout_ms=1000),
+)}
@@ -0,0 +1,125 @@
+import html
+from functools import lru_cache
+from typing import Iterable, List
+
+# Ограничение Telegram на длину одного сообщения.
+MESSAGE_LIMIT = 4096
+# Ограничение на один фрагмент, чтобы он всегда помещался в сообщение
+# вместе с заголовком.
+FRAGMENT_LIMIT = 3500
+SEPARATOR = "\n" + "-" * 30 + "\n"
+# Ограничение на текст запроса /find в заголовке ответа.
+QUERY_LIMIT = 200
+# Сколько отрендеренных фрагментов держать в памяти.
+FRAGMENT_CACHE_SIZE = 20000
+# Фрагменты с описанием длиннее этого (в символах) не кэшируются: ключ и
+# значение кэша держат текст описания, и длинные описания умножили бы
+# память каждого процесса на FRAGMENT_CACHE_SIZE.
+CACHED_DETAILS_LIMIT = 512
+
+
+def message_length(text: str) -> int:
+    """Длина текста в единицах UTF-16, как ее считает Telegram"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def escape_truncated(text: str, limit: int) -> str:
+    """Экранирует text для HTML, обрезая его по символам до limit.
+    
+    Обрезка идет по исходным символам, поэтому HTML-сущности
+    (&amp;, &lt; ...) никогда не разрезаются посередине.
+    """
+    escaped = html.escape(text, quote=False)
+    if message_length(escaped) <= limit:
+        return escaped
+    
+    parts = []
+    length = 0
+    for char in text:
+        piece = html.escape(char, quote=False)
+        piece_length = message_length(piece)
+        if length + piece_length > limit - 1:
+            break
+        parts.append(piece)
+        length += piece_length
+    parts.append('…')
+    return ''.join(parts)
+
+
+@lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
+def _render_fragment(event_id, name, event_date, event_time, details,
+                     calendar_title=None):
+    """Фрагмент одного события и его длина.
+    
+    Ключ кэша - все выводимые поля, поэтому измененное событие (новая
+    версия) рендерится заново, а неизмененное берется из кэша.
+    """
+    parts = [
+        f"🆔 {event_id}\n",
+        f"📝 {html.escape(name, quote=False)}\n",
+        f"📅 {event_date}",
+    ]
+    if event_time:
+        parts.append(f" ⏰ {event_time}")
+    if calendar_title:
+        parts.append(f"\n👥 {escape_truncated(calendar_title, 255)}")
+    if details:
+        budget = FRAGMENT_LIMIT - message_length(''.join(parts)) - 4
+        parts.append(f"\n📋 {escape_truncated(details, budget)}")
+    fragment = ''.join(parts)
+    return fragment, message_length(fragment)
+
+
+def render_event(event):
+    """Возвращает экранированный фрагмент события и его длину"""
+    details = event.get('event_details')
+    render = _render_fragment
+    if details and len(details) > CACHED_DETAILS_LIMIT:
+        # Больше FRAGMENT_LIMIT символов в сообщение все равно не войдет;
+        # обрезка до вызова не меняет результат.
+        details = details[:FRAGMENT_LIMIT + 1]
+        render = _render_fragment.__wrapped__
+    return render(
+        event['id'],
+        event['event_name'],
+        event['event_date'],
+        event.get('event_time'),
+        details,
+        event.get('calendar_title'),
+    )
+
+
+def pack_messages(fragments: Iterable, header: str = '',
+                  separator: str = SEPARATOR,
+                  limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Раскладывает фрагменты (текст, длина) по сообщениям.
+    
+    Фрагмент целиком попадает в одно сообщение: записи и HTML-теги не
+    разрываются на границе. Если заголовок не помещается вместе с первым
+    фрагментом, он уходит отдельным сообщением. Сообщение собирается
+    через join, без повторного копирования растущей строки.
+    """
+    messages = []
+    current = [header] if header else []
+    current_length = message_length(header)
+    separator_length = message_length(separator)
+    has_events = False
+    
+    for fragment, length in fragments:
+        needed = length + separator_length
+        if current and current_length + needed > limit:
+            messages.append(''.join(current))
+            current, current_length = [], 0
+        current.append(fragment)
+        current.append(separator)
+        current_length += needed
+        has_events = True
+    
+    if has_events:
+        messages.append(''.join(current))
+    return messages
+
+
+def render_events(events, header: str = '') -> List[str]:
+    """Готовые к отправке HTML-сообщения со списком событий"""
+    return pack_messages((render_event(event) for event in events), header)
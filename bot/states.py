@@ -23,6 +23,7 @@ class EventData:
     time: Optional[str] = None
     details: Optional[str] = None
     event_id: Optional[int] = None
+    duration: Optional[int] = None
 
 
 class UserStateManager:
@@ -32,11 +33,7 @@ class UserStateManager:
     def get_user_state(self, user_id):
         """Получает состояние пользователя"""
         with self.db.get_cursor() as cursor:
-            cursor.execute('''
-                SELECT state, event_data
-                FROM user_states
-                WHERE user_id = %s
-            ''', (user_id,))
+            self.db.execute(cursor, 'get_user_state', (user_id,))
             result = cursor.fetchone()
             if result:
                 event_data = json.loads(result['event_data']) if result[
@@ -50,21 +47,11 @@ class UserStateManager:
         with self.db.get_cursor() as cursor:
             event_data_json = json.dumps(
                 asdict(event_data)) if event_data else None
-            cursor.execute('''
-                INSERT INTO user_states (user_id, state, event_data, updated_at)
-                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-                ON CONFLICT (user_id)
-                DO UPDATE SET
-                    state = EXCLUDED.state,
-                    event_data = EXCLUDED.event_data,
-                    updated_at = CURRENT_TIMESTAMP
-            ''', (user_id, state.value, event_data_json))
+            self.db.execute(cursor, 'set_user_state',
+                            (user_id, state.value, event_data_json))
     
     def clear_user_state(self, user_id):
         """Очищает состояние пользователя"""
         with self.db.get_cursor() as cursor:
-            cursor.execute('''
-                DELETE FROM user_states
-                WHERE user_id = %s
-            ''', (user_id,))
+            self.db.execute(cursor, 'clear_user_state', (user_id,))
             
\ No newline at end of file
@@ -0,0 +1,90 @@
+import logging
+from collections import OrderedDict
+from time import monotonic
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+logger = logging.getLogger(__name__)
+
+
+class _Bucket:
+    """Состояние ведра токенов одного пользователя"""
+    __slots__ = ('tokens', 'updated_at', 'muted_until')
+    
+    def __init__(self, tokens, now):
+        self.tokens = tokens
+        self.updated_at = now
+        self.muted_until = 0.0
+
+
+class UpdateThrottle:
+    """Ограничение входящих обновлений на пользователя (token bucket).
+    
+    Работает после отсева повторов и до всех обработчиков, не обращаясь
+    к БД: флуд не доходит до UserStateManager и Calendar. Исчерпавший ведро
+    пользователь замолкает на mute_seconds и получает одно
+    предупреждение; остальные его обновления молча отбрасываются.
+    Ведра хранятся в LRU ограниченного размера.
+    """
+    
+    def __init__(self, burst=10, refill_rate=1.0, mute_seconds=60,
+                 max_users=10000):
+        self.burst = burst
+        self.refill_rate = refill_rate
+        self.mute_seconds = mute_seconds
+        self.max_users = max_users
+        self._buckets = OrderedDict()
+        # Счетчики для мониторинга (выводятся в /stats).
+        self.dropped_updates = 0
+        self.mutes = 0
+    
+    def allow(self, user_id, now=None):
+        """Возвращает (пропустить ли обновление, нужно ли предупредить)"""
+        now = monotonic() if now is None else now
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = _Bucket(self.burst, now)
+            self._buckets[user_id] = bucket
+            if len(self._buckets) > self.max_users:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(user_id)
+        
+        if now < bucket.muted_until:
+            self.dropped_updates += 1
+            return False, False
+        
+        bucket.tokens = min(
+            self.burst,
+            bucket.tokens + (now - bucket.updated_at) * self.refill_rate
+        )
+        bucket.updated_at = now
+        
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True, False
+        
+        bucket.muted_until = now + self.mute_seconds
+        self.dropped_updates += 1
+        self.mutes += 1
+        return False, True
+    
+    async def check(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик высокого приоритета: останавливает флуд"""
+        user = update.effective_user
+        if user is None:
+            return
+        
+        allowed, warn = self.allow(user.id)
+        if allowed:
+            return
+        
+        if warn:
+            logger.warning(f"User {user.id} muted for {self.mute_seconds}s "
+                           f"(dropped updates: {self.dropped_updates})")
+            if update.effective_message:
+                await update.effective_message.reply_text(
+                    f"⏳ Слишком много сообщений. Подождите "
+                    f"{self.mute_seconds} секунд."
+                )
+        raise ApplicationHandlerStop
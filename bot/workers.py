@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+from telegram import Bot, Update
+from telegram.error import NetworkError, RetryAfter, TimedOut
+
+logger = logging.getLogger(__name__)
+
+# Сколько обновлений может ждать в очереди одного воркера.
+WORKER_QUEUE_SIZE = 1000
+# Сколько секунд ждать места в очереди воркера, прежде чем считать его
+# зависшим, и сколько - при остановке.
+WORKER_SUBMIT_TIMEOUT = 30
+WORKER_STOP_TIMEOUT = 5
+# Паузы между повторами get_updates после сетевых ошибок, секунд.
+POLL_RETRY_DELAY = 1
+POLL_MAX_RETRY_DELAY = 30
+
+
+def shard_for(key, num_workers):
+    """Номер воркера для ключа (user_id): один пользователь - один воркер"""
+    return key % num_workers
+
+
+def update_shard_key(update: Update):
+    """Ключ шардирования обновления: пользователь, иначе чат"""
+    if update.effective_user:
+        return update.effective_user.id
+    if update.effective_chat:
+        return update.effective_chat.id
+    return update.update_id
+
+
+class WorkerPool:
+    """Процессы-обработчики, у каждого своя очередь.
+    
+    Обновления одного пользователя всегда попадают в одну очередь и
+    обрабатываются одним процессом последовательно, поэтому порядок
+    шагов диалога сохраняется без общего UserStateManager. Упавший
+    воркер перезапускается на той же очереди (respawn_dead).
+    """
+    
+    def __init__(self, num_workers, target, args=(),
+                 queue_size=WORKER_QUEUE_SIZE):
+        # spawn: воркеры не наследуют соединения и event loop родителя.
+        self._context = multiprocessing.get_context('spawn')
+        self._target = target
+        self._args = args
+        self.queues = [self._context.Queue(maxsize=queue_size)
+                       for _ in range(num_workers)]
+        self.processes = [self._process(index)
+                          for index in range(num_workers)]
+    
+    def __len__(self):
+        return len(self.processes)
+    
+    def _process(self, index):
+        return self._context.Process(
+            target=self._target,
+            args=(index, self.queues[index], *self._args),
+            name=f'bot-worker-{index}', daemon=True)
+    
+    def start(self):
+        for process in self.processes:
+            process.start()
+    
+    def respawn_dead(self):
+        """Перезапускает завершившиеся воркеры; возвращает их число"""
+        respawned = 0
+        for index, process in enumerate(self.processes):
+            if process.is_alive():
+                continue
+            logger.error(f"Воркер {index} завершился с кодом "
+                         f"{process.exitcode}, перезапуск")
+            self.processes[index] = self._process(index)
+            self.processes[index].start()
+            respawned += 1
+        return respawned
+    
+    async def submit(self, key, item, timeout=WORKER_SUBMIT_TIMEOUT):
+        """Ставит item в очередь воркера, отвечающего за key.
+        
+        Ожидание места идет в пуле потоков, не блокируя event loop;
+        если очередь не освободилась за timeout секунд, воркер считается
+        зависшим и выбрасывается queue.Full.
+        """
+        worker_queue = self.queues[shard_for(key, len(self))]
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: worker_queue.put(item, timeout=timeout))
+    
+    def stop(self, timeout=WORKER_STOP_TIMEOUT):
+        """Посылает воркерам сигнал завершения и ждет их"""
+        for process, worker_queue in zip(self.processes, self.queues):
+            try:
+                worker_queue.put(None, timeout=timeout)
+            except queue.Full:
+                # Воркер завис и не разбирает очередь.
+                process.terminate()
+        for process, worker_queue in zip(self.processes, self.queues):
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+            # Не ждать при выходе, пока очередь допишется в пустоту.
+            worker_queue.cancel_join_thread()
+
+
+def run_worker(index, queue, *args):
+    """Точка входа процесса-воркера: обрабатывает обновления из очереди"""
+    # Прерывание обрабатывает фронт, воркер завершается по None в очереди.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        format='%(asctime)s - %(processName)s - %(name)s - '
+               '%(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    asyncio.run(_worker_loop(index, queue, *args))
+
+
+async def _worker_loop(index, queue, num_workers):
+    from telegram.ext import Application
+    from bot.database import Database
+    from bot.main import build_application
+    
+    # Схему создает фронт до запуска воркеров.
+    db = Database(auto_migrate=False)
+    db.warm_up()
+    application = build_application(
+        db, name=f'worker-{index}',
+        builder=Application.builder().updater(None),
+        accepts=lambda user_id: shard_for(user_id, num_workers) == index
+    )
+    loop = asyncio.get_running_loop()
+    
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    logger.info(f"Воркер {index} запущен")
+    try:
+        while True:
+            data = await loop.run_in_executor(None, queue.get)
+            if data is None:
+                break
+            update = Update.de_json(data, application.bot)
+            await application.process_update(update)
+    finally:
+        await application.stop()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+        await application.shutdown()
+        db.close()
+
+
+async def _poll(bot: Bot, pool: WorkerPool):
+    """Получает обновления long polling'ом и раскладывает по воркерам"""
+    offset = None
+    delay = POLL_RETRY_DELAY
+    async with bot:
+        while True:
+            # Временные ошибки Telegram не должны останавливать фронт и
+            # вместе с ним всех воркеров: повторяем, как Updater PTB.
+            try:
+                updates = await bot.get_updates(
+                    offset=offset, timeout=30,
+                    allowed_updates=Update.ALL_TYPES
+                )
+            except RetryAfter as e:
+                logger.warning(f"Flood control, retry in {e.retry_after} s")
+                await asyncio.sleep(e.retry_after)
+                continue
+            except (NetworkError, TimedOut) as e:
+                logger.warning(f"Error polling updates: {e}; "
+                               f"retry in {delay} s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, POLL_MAX_RETRY_DELAY)
+                continue
+            delay = POLL_RETRY_DELAY
+            pool.respawn_dead()
+            
+            for update in updates:
+                try:
+                    await pool.submit(update_shard_key(update),
+                                      update.to_dict())
+                except queue.Full:
+                    # Воркер не разбирает очередь: завершаем фронт, чтобы
+                    # контейнер перезапустился. offset не сдвинут, и
+                    # Telegram доставит обновление повторно.
+                    logger.critical("Очередь воркера переполнена, остановка")
+                    raise
+                offset = update.update_id + 1
+
+
+def run_sharded(token, num_workers, health=None):
+    """Запускает фронт и num_workers процессов-обработчиков"""
+    if os.getenv('DB_AUTO_MIGRATE', 'True') == 'True':
+        from bot.migrate import migrate
+        migrate()
+    
+    pool = WorkerPool(num_workers, run_worker, args=(num_workers,))
+    pool.start()
+    if health:
+        health.checks.append(
+            lambda: all(process.is_alive() for process in pool.processes))
+        health.set_ready()
+    # docker stop присылает SIGTERM: завершаемся так же, как по Ctrl+C.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(_poll(Bot(token), pool))
+    except KeyboardInterrupt:
+        logger.info("Остановка воркеров...")
+    finally:
+        pool.stop()
@@ -0,0 +1,106 @@
+"""
+Лента изменений событий на основе PostgreSQL LISTEN/NOTIFY.
+Триггер на таблице events шлет компактные уведомления в канал
+events_changes; в каждом процессе работает один слушатель, который
+раздает их подписчикам (SSE-соединениям) по user_id.
+"""
+
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = 'events_changes'
+# Сколько непрочитанных изменений держать для одного подписчика.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class ChangeFeed:
+    """Один LISTEN-слушатель на процесс с раздачей подписчикам."""
+    
+    def __init__(self, channel=EVENTS_CHANNEL):
+        self.channel = channel
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def subscribe(self, user_id):
+        """Возвращает очередь изменений событий пользователя."""
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(str(user_id), set()).add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='change-feed', daemon=True)
+                self._thread.start()
+        return subscriber
+    
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(str(user_id), set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(str(user_id), None)
+    
+    def _publish(self, change):
+        with self._lock:
+            subscribers = list(self._subscribers.get(
+                str(change.get('user_id')), ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(change)
+            except queue.Full:
+                # Медленный клиент: выбрасываем самое старое изменение.
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                subscriber.put_nowait(change)
+    
+    def _connect(self):
+        db = settings.DATABASES['default']
+        conn = psycopg2.connect(
+            dbname=db['NAME'], user=db['USER'], password=db['PASSWORD'],
+            host=db['HOST'], port=db['PORT'],
+            application_name='calendar_api_listener'
+        )
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.channel}')
+        return conn
+    
+    def _run(self):
+        delay = 1
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                delay = 1
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            self._publish(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning(
+                                f"Bad change payload: {notify.payload}")
+            except psycopg2.Error as e:
+                logger.error(f"Change feed error: {e}")
+                if conn is not None:
+                    conn.close()
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+change_feed = ChangeFeed()
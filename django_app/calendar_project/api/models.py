@@ -1,12 +1,56 @@
 from django.db import models
 
+# Длительность события без явного окончания, минут (как в боте).
+DEFAULT_DURATION_MINUTES = 60
+
+
+class Calendar(models.Model):
+    """Общий календарь группового чата."""
+    chat_id = models.BigIntegerField(unique=True)
+    title = models.CharField(max_length=255)
+    owner_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'calendars'
+    
+    def __str__(self):
+        return self.title
+
+
+class CalendarMember(models.Model):
+    """Участник общего календаря.
+    
+    В таблице составной первичный ключ (calendar_id, user_id); модель
+    используется только для фильтрации через join.
+    """
+    calendar = models.ForeignKey(Calendar, on_delete=models.CASCADE,
+                                 primary_key=True, related_name='members',
+                                 db_column='calendar_id')
+    user_id = models.BigIntegerField()
+    joined_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'calendar_members'
+        managed = False
+        unique_together = [('calendar', 'user_id')]
+    
+    def __str__(self):
+        return f"User {self.user_id} in {self.calendar_id}"
+
 
 class Event(models.Model):
     user_id = models.BigIntegerField()
+    # Событие общего календаря; NULL - личное событие user_id.
+    calendar = models.ForeignKey(Calendar, null=True, blank=True,
+                                 on_delete=models.CASCADE,
+                                 related_name='events',
+                                 db_column='calendar_id')
     event_name = models.CharField(max_length=255)
     event_date = models.DateField()
     event_time = models.TimeField(null=True, blank=True)
     event_details = models.TextField(blank=True, null=True)
+    duration_minutes = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -29,4 +73,50 @@ class UserState(models.Model):
     
     def __str__(self):
         return f"User {self.user_id} - {self.state}"
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=255, primary_key=True)
+    event = models.ForeignKey(Event, null=True, blank=True,
+                              on_delete=models.SET_NULL,
+                              db_column='event_id')
+    # sha256 тела запроса; NULL у ключей, сохраненных до его появления.
+    request_hash = models.CharField(max_length=64, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'idempotency_keys'
+    
+    def __str__(self):
+        return f"{self.key} -> {self.event_id}"
+
+
+class DailyStats(models.Model):
+    """Сводка по дню: представление, суммирующее stats_daily_shards."""
+    day = models.DateField(primary_key=True)
+    events_created = models.IntegerField(default=0)
+    events_deleted = models.IntegerField(default=0)
+    active_users = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'stats_daily'
+        managed = False
+        ordering = ['-day']
+    
+    def __str__(self):
+        return f"{self.day}: {self.events_created}"
+
+
+class UserStats(models.Model):
+    """Количество событий пользователя; обновляется триггером."""
+    user_id = models.BigIntegerField(primary_key=True)
+    event_count = models.IntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'stats_user_totals'
+        managed = False
+    
+    def __str__(self):
+        return f"User {self.user_id}: {self.event_count}"
     
\ No newline at end of file
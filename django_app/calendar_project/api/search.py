@@ -0,0 +1,35 @@
+"""
+Полнотекстовый поиск по событиям.
+Использует колонку search_vector (tsvector, русская и английская
+конфигурации) и триграммный индекс по названию для запросов с опечатками.
+"""
+
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+TSQUERY_SQL = (
+    "(websearch_to_tsquery('russian', %s) || "
+    "websearch_to_tsquery('english', %s))"
+)
+
+
+def search_events(queryset, text):
+    """Фильтрует и ранжирует события по тексту запроса."""
+    matches = queryset.filter(
+        RawSQL(f"search_vector @@ {TSQUERY_SQL}", (text, text),
+               output_field=BooleanField())
+    ).annotate(
+        rank=RawSQL(f"ts_rank_cd(search_vector, {TSQUERY_SQL})", (text, text),
+                    output_field=FloatField())
+    ).order_by('-rank', 'event_date', 'event_time')
+    
+    if matches.exists():
+        return matches
+    
+    # Нечеткий поиск по триграммам, если полнотекстовый ничего не нашел.
+    return queryset.filter(
+        RawSQL("%s <%% event_name", (text,), output_field=BooleanField())
+    ).annotate(
+        rank=RawSQL("word_similarity(%s, event_name)", (text,),
+                    output_field=FloatField())
+    ).order_by('-rank', 'event_date', 'event_time')
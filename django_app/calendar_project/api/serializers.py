@@ -1,12 +1,44 @@
+from datetime import datetime, timedelta
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
 from rest_framework import serializers
-from .models import Event
+from .models import (Calendar, CalendarMember, Event, DailyStats, UserStats,
+                     DEFAULT_DURATION_MINUTES)
+
+
+def event_range(event_date, event_time, duration_minutes):
+    """Начало и конец события, как в генерируемой колонке time_range."""
+    start = datetime.combine(event_date, event_time)
+    return start, start + timedelta(
+        minutes=duration_minutes or DEFAULT_DURATION_MINUTES)
+
+
+class CalendarField(serializers.PrimaryKeyRelatedField):
+    """calendar_id; в пакетном режиме календари берутся из context."""
+    
+    def to_internal_value(self, data):
+        calendars = self.context.get('calendars')
+        if calendars is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return calendars[int(data)]
+        except (KeyError, ValueError):
+            self.fail('does_not_exist', pk_value=data)
 
 
 class EventSerializer(serializers.ModelSerializer):
+    calendar_id = CalendarField(
+        source='calendar', queryset=Calendar.objects.all(),
+        allow_null=True, required=False)
+    
     class Meta:
         model = Event
-        fields = ['id', 'user_id', 'event_name', 'event_date',
-                  'event_time', 'event_details', 'created_at']
+        fields = ['id', 'user_id', 'calendar_id', 'event_name', 'event_date',
+                  'event_time', 'event_details', 'duration_minutes',
+                  'created_at']
         read_only_fields = ['id', 'created_at']
     
     def validate_event_date(self, value):
@@ -16,4 +48,135 @@ class EventSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Дата события не может быть в прошлом")
         return value
+    
+    def validate(self, attrs):
+        """Проверка участия в календаре и пересечения с событиями.
+        
+        В пакетном режиме (context['batch']) обе проверки выполняются
+        для всего пакета сразу функцией find_batch_violations.
+        """
+        if self.context.get('batch'):
+            return attrs
+        
+        def current(name):
+            if name in attrs:
+                return attrs[name]
+            return getattr(self.instance, name, None)
+        
+        calendar = current('calendar')
+        if calendar is not None and not CalendarMember.objects.filter(
+                calendar=calendar, user_id=current('user_id')).exists():
+            raise serializers.ValidationError({
+                'calendar_id': "Пользователь не участник календаря"
+            })
+        
+        event_time = current('event_time')
+        if not event_time:
+            return attrs
+        
+        start, end = event_range(current('event_date'), event_time,
+                                 current('duration_minutes'))
+        conflicts = Event.objects.filter(
+            user_id=current('user_id')
+        ).filter(
+            RawSQL("time_range && tsrange(%s, %s)", (start, end),
+                   output_field=BooleanField())
+        )
+        if self.instance is not None:
+            conflicts = conflicts.exclude(pk=self.instance.pk)
+        
+        conflict_ids = list(conflicts.values_list('id', flat=True)[:10])
+        if conflict_ids:
+            raise serializers.ValidationError({
+                'event_time': "Время пересекается с событиями: " +
+                              ", ".join(map(str, conflict_ids))
+            })
+        return attrs
+
+
+def find_batch_violations(items, exclude_ids=()):
+    """Проверки EventSerializer.validate для пакета: два запроса на все.
+    
+    items - пары (индекс, итоговые значения события: user_id,
+    calendar_id, event_date, event_time, duration_minutes). События
+    exclude_ids (изменяемые и удаляемые в пакете) не считаются
+    пересечениями. Операции пакета проверяются и друг с другом - в
+    памяти, без запроса. Возвращает {индекс: ошибки}.
+    """
+    errors = {}
+    members = [(index, values['calendar_id'], values['user_id'])
+               for index, values in items
+               if values.get('calendar_id') is not None]
+    ranges = []
+    with connection.cursor() as cursor:
+        if members:
+            rows = ', '.join(['(%s::int, %s::int, %s::bigint)'] * len(members))
+            cursor.execute(f'''
+                SELECT v.idx
+                FROM (VALUES {rows}) AS v (idx, calendar_id, user_id)
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM calendar_members m
+                    WHERE m.calendar_id = v.calendar_id
+                      AND m.user_id = v.user_id
+                )
+            ''', [value for member in members for value in member])
+            for (index,) in cursor.fetchall():
+                errors[index] = {
+                    'calendar_id': "Пользователь не участник календаря"
+                }
+        
+        for index, values in items:
+            if index not in errors and values.get('event_time'):
+                ranges.append((index, values['user_id'], *event_range(
+                    values['event_date'], values['event_time'],
+                    values.get('duration_minutes'))))
+        if ranges:
+            rows = ', '.join(
+                ['(%s::int, %s::bigint, %s::timestamp, %s::timestamp)']
+                * len(ranges))
+            cursor.execute(f'''
+                SELECT v.idx, (array_agg(e.id ORDER BY e.id))[1:10]
+                FROM (VALUES {rows}) AS v (idx, user_id, starts_at, ends_at)
+                JOIN events e
+                  ON e.user_id = v.user_id
+                 AND e.time_range && tsrange(v.starts_at, v.ends_at)
+                WHERE NOT (e.id = ANY(%s::int[]))
+                GROUP BY v.idx
+            ''', [value for row in ranges for value in row] +
+                [list(exclude_ids)])
+            for index, conflict_ids in cursor.fetchall():
+                errors[index] = {
+                    'event_time': "Время пересекается с событиями: " +
+                                  ", ".join(map(str, conflict_ids))
+                }
+    
+    # Пересечения внутри пакета: интервалы пользователя по началу; каждый
+    # сравнивается с самым поздно заканчивающимся из предыдущих.
+    by_user = {}
+    for index, user_id, start, end in ranges:
+        by_user.setdefault(user_id, []).append((start, end, index))
+    for user_ranges in by_user.values():
+        user_ranges.sort()
+        latest_end, latest_index = None, None
+        for start, end, index in user_ranges:
+            if latest_end is not None and start < latest_end:
+                errors.setdefault(index, {
+                    'event_time': "Время пересекается с операцией пакета "
+                                  f"{latest_index}"
+                })
+            if latest_end is None or end > latest_end:
+                latest_end, latest_index = end, index
+    return errors
+
+
+class DailyStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyStats
+        fields = ['day', 'events_created', 'events_deleted', 'active_users']
+
+
+class UserStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserStats
+        fields = ['user_id', 'event_count', 'last_activity']
     
\ No newline at end of file
@@ -1,10 +1,18 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
-from .views import EventViewSet
+from .views import EventViewSet, StatsViewSet, event_stream
 
 router = DefaultRouter()
 router.register(r'events', EventViewSet, basename='event')
+router.register(r'stats', StatsViewSet, basename='stats')
 
 urlpatterns = [
+    # Раньше роутера: иначе 'stream' совпадет с events/{pk}/.
+    re_path(r'^events/stream/?$', event_stream, name='event-stream'),
+    # Роутер требует завершающий '/', а POST без него APPEND_SLASH не
+    # перенаправит без потери тела - принимаем оба варианта.
+    re_path(r'^events/batch/?$',
+            EventViewSet.as_view({'post': 'batch'}, detail=False),
+            name='event-batch'),
     path('', include(router.urls)),
 ]
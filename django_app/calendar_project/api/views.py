@@ -1,27 +1,111 @@
+import hashlib
+import json
+import queue
+from datetime import date, timedelta
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Event
-from .serializers import EventSerializer
+from django.views.decorators.http import require_GET
+from .changefeed import change_feed
+from .models import Calendar, Event, IdempotencyKey, DailyStats, UserStats
+from .search import search_events
+from .serializers import (EventSerializer, DailyStatsSerializer,
+                          UserStatsSerializer, find_batch_violations)
+
+# Максимальная длина Idempotency-Key (колонка key - VARCHAR(255)).
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+# Допустимые операции и их максимальное число в одном пакете.
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+BATCH_MAX_OPERATIONS = 1000
+
+
+def _batch_values(data, instance=None):
+    """Итоговые значения события пакета для find_batch_violations."""
+    values = {field: getattr(instance, field, None) for field in
+              ('user_id', 'calendar_id', 'event_date', 'event_time',
+               'duration_minutes')}
+    values.update(data)
+    if 'calendar' in values:
+        calendar = values.pop('calendar')
+        values['calendar_id'] = calendar.pk if calendar else None
+    return values
 
 
 class EventViewSet(viewsets.ModelViewSet):
     """ViewSet для работы с событиями через API."""
     serializer_class = EventSerializer
     queryset = Event.objects.all()
+    # Постраничная выдача включается параметрами ?limit=&offset=.
+    pagination_class = LimitOffsetPagination
     
     def get_queryset(self):
-        """Фильтрация событий по user_id."""
+        """Фильтрация событий по user_id, calendar_id и запросу q."""
         queryset = super().get_queryset()
         user_id = self.request.query_params.get('user_id')
         if user_id:
             queryset = queryset.filter(user_id=user_id)
+        calendar_id = self.request.query_params.get('calendar_id')
+        if calendar_id:
+            queryset = queryset.filter(calendar_id=calendar_id)
+        search = self.request.query_params.get('q')
+        if search and self.action == 'list':
+            queryset = search_events(queryset, search)
         return queryset
     
+    def create(self, request, *args, **kwargs):
+        """Создание события с поддержкой заголовка Idempotency-Key.
+        
+        Повторный запрос с тем же ключом не создает дубликат, а
+        возвращает ранее созданное событие. Ключ связан с хэшем тела
+        запроса: тот же ключ с другим телом (в том числе с другим
+        user_id) отклоняется с 422.
+        """
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {'error': f'Idempotency-Key must be at most '
+                          f'{IDEMPOTENCY_KEY_MAX_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        request_hash = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        
+        with transaction.atomic():
+            # Параллельный запрос с тем же ключом ждет на уникальном
+            # индексе до фиксации первого и затем получает его запись.
+            record, created = IdempotencyKey.objects.get_or_create(
+                key=key, defaults={'request_hash': request_hash})
+            if not created:
+                if record.request_hash not in (None, request_hash):
+                    return Response(
+                        {'error': 'Idempotency-Key already used with a '
+                                  'different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                if record.event is None:
+                    return Response(
+                        {'error': 'Idempotency-Key already used'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                serializer = self.get_serializer(record.event)
+                return Response(serializer.data, status=status.HTTP_200_OK)
+            
+            response = super().create(request, *args, **kwargs)
+            record.event_id = response.data['id']
+            record.save(update_fields=['event'])
+            return response
+    
     @action(detail=False, methods=['get'])
     def user_events(self, request):
-        """Получение событий конкретного пользователя."""
+        """Личные события пользователя и события его общих календарей."""
         user_id = request.query_params.get('user_id')
         if not user_id:
             return Response(
@@ -29,7 +113,12 @@ class EventViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        events = Event.objects.filter(user_id=user_id)
+        # Общие события читаются через join по участникам календарей,
+        # а не копируются каждому участнику.
+        events = Event.objects.filter(
+            Q(user_id=user_id, calendar__isnull=True) |
+            Q(calendar__members__user_id=user_id)
+        )
         serializer = self.get_serializer(events, many=True)
         return Response(serializer.data)
     
@@ -48,4 +137,223 @@ class EventViewSet(viewsets.ModelViewSet):
         event = get_object_or_404(Event, id=event_id, user_id=user_id)
         event.delete()
         return Response({'message': 'Event deleted successfully'})
-    
\ No newline at end of file
+    
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Пакет операций create/update/delete в одной транзакции.
+        
+        Тело: {"operations": [{"op": "create", "data": {...}},
+        {"op": "update", "id": 1, "data": {...}}, {"op": "delete", "id": 2}]}.
+        Все операции проверяются до записи: при любой ошибке ничего не
+        меняется и возвращается 400 с ошибками по индексам операций.
+        Участие в календарях и пересечения проверяются двумя запросами на
+        весь пакет; запись - bulk_create, bulk_update и один DELETE.
+        """
+        operations = request.data
+        if isinstance(operations, dict):
+            operations = operations.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return Response(
+                {'error': 'operations must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            return Response(
+                {'error': f'At most {BATCH_MAX_OPERATIONS} operations '
+                          f'per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        errors = {}
+        creates, updates, deletes = [], [], []
+        event_ids = set()
+        for index, operation in enumerate(operations):
+            op = operation.get('op') if isinstance(operation, dict) else None
+            if op not in BATCH_OPERATIONS:
+                errors[index] = {
+                    'op': f"Ожидается одно из: {', '.join(BATCH_OPERATIONS)}"
+                }
+            elif op == 'create':
+                creates.append(index)
+            elif not isinstance(operation.get('id'), int):
+                errors[index] = {'id': "Обязательное целое поле"}
+            elif operation['id'] in event_ids:
+                errors[index] = {'id': "Событие встречается в пакете дважды"}
+            else:
+                event_ids.add(operation['id'])
+                (updates if op == 'update' else deletes).append(index)
+        
+        with transaction.atomic():
+            # Изменяемые и удаляемые события - одним запросом под блокировкой.
+            instances = Event.objects.select_for_update().in_bulk(event_ids)
+            for index in updates + deletes:
+                if operations[index]['id'] not in instances:
+                    errors[index] = {'id': "Событие не найдено"}
+            
+            # Пакетный режим: сериализаторы не ходят в БД за каждым
+            # элементом, календари загружены заранее одним запросом.
+            context = self.get_serializer_context()
+            context['batch'] = True
+            calendar_ids = set()
+            for index in creates + updates:
+                data = operations[index].get('data')
+                if isinstance(data, dict) and \
+                        str(data.get('calendar_id')).isdigit():
+                    calendar_ids.add(int(data['calendar_id']))
+            context['calendars'] = Calendar.objects.in_bulk(calendar_ids)
+            
+            create_serializer = EventSerializer(
+                data=[operations[index].get('data') or {}
+                      for index in creates],
+                many=True, context=context
+            )
+            items = []
+            if create_serializer.is_valid():
+                items.extend(
+                    (index, _batch_values(data)) for index, data
+                    in zip(creates, create_serializer.validated_data))
+            else:
+                for index, item_errors in zip(creates,
+                                              create_serializer.errors):
+                    if item_errors:
+                        errors[index] = item_errors
+            
+            update_serializers = {}
+            for index in updates:
+                if index in errors:
+                    continue
+                serializer = EventSerializer(
+                    instances[operations[index]['id']],
+                    data=operations[index].get('data') or {},
+                    partial=True, context=context
+                )
+                if serializer.is_valid():
+                    update_serializers[index] = serializer
+                else:
+                    errors[index] = serializer.errors
+            
+            for index, serializer in update_serializers.items():
+                items.append((index, _batch_values(
+                    serializer.validated_data, serializer.instance)))
+            # Изменяемые и удаляемые события пакета - не пересечения:
+            # их текущие интервалы будут заменены или удалены.
+            errors.update(find_batch_violations(items, event_ids))
+            
+            if errors:
+                return Response(
+                    {'errors': [{'index': index, 'errors': item_errors}
+                                for index, item_errors
+                                in sorted(errors.items())]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            created = Event.objects.bulk_create(
+                [Event(**data) for data in create_serializer.validated_data])
+            
+            changed_fields = set()
+            for serializer in update_serializers.values():
+                for field, value in serializer.validated_data.items():
+                    setattr(serializer.instance, field, value)
+                    changed_fields.add(field)
+            if changed_fields:
+                Event.objects.bulk_update(
+                    [serializer.instance
+                     for serializer in update_serializers.values()],
+                    sorted(changed_fields)
+                )
+            
+            if deletes:
+                Event.objects.filter(
+                    id__in=[operations[index]['id'] for index in deletes]
+                ).delete()
+        
+        results = []
+        for index, event in zip(creates, created):
+            results.append({'index': index, 'op': 'create',
+                            'status': status.HTTP_201_CREATED,
+                            'id': event.id, 'user_id': event.user_id,
+                            'event': self.get_serializer(event).data})
+        for index, serializer in update_serializers.items():
+            event = serializer.instance
+            results.append({'index': index, 'op': 'update',
+                            'status': status.HTTP_200_OK,
+                            'id': event.id, 'user_id': event.user_id,
+                            'event': serializer.data})
+        for index in deletes:
+            event = instances[operations[index]['id']]
+            results.append({'index': index, 'op': 'delete',
+                            'status': status.HTTP_204_NO_CONTENT,
+                            'id': event.id, 'user_id': event.user_id})
+        results.sort(key=lambda result: result['index'])
+        return Response({'results': results})
+
+
+class StatsViewSet(viewsets.ViewSet):
+    """Статистика использования из сводных таблиц (без сканирования events)."""
+    
+    def list(self, request):
+        """Сводка за сегодня."""
+        today = DailyStats.objects.filter(day=date.today()).first()
+        if today is None:
+            return Response({'day': date.today(), 'events_created': 0,
+                             'events_deleted': 0, 'active_users': 0})
+        return Response(DailyStatsSerializer(today).data)
+    
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        """Сводка по дням за последние days дней (по умолчанию 30)."""
+        try:
+            days = min(int(request.query_params.get('days', 30)), 366)
+        except ValueError:
+            return Response(
+                {'error': 'days must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rows = DailyStats.objects.filter(
+            day__gt=date.today() - timedelta(days=days))
+        return Response(DailyStatsSerializer(rows, many=True).data)
+    
+    @action(detail=False, methods=['get'])
+    def user(self, request):
+        """Количество событий пользователя."""
+        user_id = request.query_params.get('user_id')
+        if not user_id:
+            return Response(
+                {'error': 'user_id parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        stats = get_object_or_404(UserStats, user_id=user_id)
+        return Response(UserStatsSerializer(stats).data)
+
+
+# Интервал пустых комментариев, удерживающих SSE-соединение, секунд.
+SSE_KEEPALIVE_SECONDS = 15
+
+
+@require_GET
+def event_stream(request):
+    """Server-Sent Events с изменениями событий пользователя."""
+    user_id = request.GET.get('user_id')
+    if not user_id:
+        return JsonResponse({'error': 'user_id parameter is required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+    
+    def stream():
+        subscriber = change_feed.subscribe(user_id)
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    change = subscriber.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {change['op']}\ndata: {json.dumps(change)}\n\n"
+        finally:
+            change_feed.unsubscribe(user_id, subscriber)
+    
+    response = StreamingHttpResponse(stream(),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
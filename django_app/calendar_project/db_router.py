@@ -0,0 +1,172 @@
+"""
+Маршрутизация запросов к БД между primary и репликами.
+Безопасные (GET/HEAD/OPTIONS) запросы читают с реплик, все записи и
+чтения внутри изменяющих запросов идут на primary. После записи
+пользователь на DB_STICKY_SECONDS закрепляется за primary
+(read-your-writes), отстающие или недоступные реплики пропускаются.
+Реплика, на которой запрос упал с OperationalError, сразу считается
+нездоровой до следующей проверки, не дожидаясь ее интервала.
+"""
+
+import itertools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+_replica_health = {}
+_round_robin = itertools.count()
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != 'default']
+
+
+def _sticky_key(user_id):
+    return f'db-sticky:{user_id}'
+
+
+def _replica_is_healthy(alias):
+    """Проверяет отставание реплики; результат кэшируется на интервал."""
+    checked_at, healthy = _replica_health.get(alias, (None, True))
+    now = time.monotonic()
+    if checked_at is not None and \
+            now - checked_at < settings.DB_REPLICA_CHECK_INTERVAL:
+        return healthy
+    
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('''
+                SELECT CASE
+                    WHEN NOT pg_is_in_recovery() THEN 0
+                    WHEN pg_last_wal_receive_lsn() =
+                         pg_last_wal_replay_lsn() THEN 0
+                    ELSE COALESCE(EXTRACT(EPOCH FROM
+                        now() - pg_last_xact_replay_timestamp()), 0)
+                END
+            ''')
+            lag = cursor.fetchone()[0]
+        healthy = lag <= settings.DB_MAX_REPLICA_LAG
+        if not healthy:
+            logger.warning(f"Replica {alias} lags by {lag:.1f}s")
+    except DatabaseError as e:
+        logger.warning(f"Replica {alias} check failed: {e}")
+        healthy = False
+    _replica_health[alias] = (now, healthy)
+    return healthy
+
+
+def _mark_unhealthy(alias, error):
+    logger.warning(f"Replica {alias} failed: {error}")
+    _replica_health[alias] = (time.monotonic(), False)
+
+
+class _ReplicaFailureWatcher:
+    """execute-обертка соединения реплики: помечает ее при сбое."""
+    
+    def __init__(self, alias):
+        self.alias = alias
+    
+    def __call__(self, execute, sql, params, many, context):
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as e:
+            _mark_unhealthy(self.alias, e)
+            raise
+
+
+def _replica_is_connected(alias):
+    """Открывает соединение с репликой и ставит на него обертку."""
+    connection = connections[alias]
+    try:
+        connection.ensure_connection()
+    except DatabaseError as e:
+        _mark_unhealthy(alias, e)
+        return False
+    if not any(isinstance(wrapper, _ReplicaFailureWatcher)
+               for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(_ReplicaFailureWatcher(alias))
+    return True
+
+
+class ReplicaRouter:
+    """DB-роутер Django: чтение с реплик, запись на primary."""
+    
+    def db_for_read(self, model, **hints):
+        # Кэш (закрепление за primary) читается там же, где пишется.
+        if getattr(_state, 'use_primary', True) or \
+                model._meta.app_label == 'django_cache':
+            return 'default'
+        aliases = replica_aliases()
+        if not aliases:
+            return 'default'
+        start = next(_round_robin)
+        for i in range(len(aliases)):
+            alias = aliases[(start + i) % len(aliases)]
+            if _replica_is_healthy(alias) and _replica_is_connected(alias):
+                return alias
+        return 'default'
+    
+    def db_for_write(self, model, **hints):
+        return 'default'
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+    
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReadYourWritesMiddleware:
+    """Выбирает primary или реплики для запроса и помечает записи."""
+    
+    def __init__(self, get_response):
+        if replica_aliases() and isinstance(caches['default'],
+                                            (LocMemCache, DummyCache)):
+            # Кэш процесса: после записи через один воркер другой
+            # прочитал бы устаревшие данные с реплики.
+            raise ImproperlyConfigured(
+                "Read replicas require a cache shared between processes")
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        user_id = request.GET.get('user_id')
+        _state.use_primary = (
+            request.method not in SAFE_METHODS
+            or (user_id is not None and cache.get(_sticky_key(user_id)))
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.use_primary = True
+        
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            if user_id is not None:
+                user_ids = {user_id}
+            else:
+                user_ids = _written_user_ids(getattr(response, 'data', None))
+            cache.set_many({_sticky_key(user_id): True
+                            for user_id in user_ids},
+                           settings.DB_STICKY_SECONDS)
+        return response
+
+
+def _written_user_ids(data):
+    """user_id из ответа на запись: одно событие или результаты пакета."""
+    if not isinstance(data, dict):
+        return set()
+    if data.get('user_id') is not None:
+        return {data['user_id']}
+    return {result['user_id'] for result in data.get('results', ())
+            if result.get('user_id') is not None}
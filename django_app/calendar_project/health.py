@@ -0,0 +1,28 @@
+"""
+Пробы liveness/readiness для контейнера API.
+/health/live - процесс отвечает; /health/ready - есть соединение с БД.
+"""
+
+import logging
+
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+
+def live(request):
+    """Процесс жив и обрабатывает запросы."""
+    return JsonResponse({'status': 'ok'})
+
+
+def ready(request):
+    """Приложение готово принимать трафик: primary доступен."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except DatabaseError as e:
+        logger.warning(f"Readiness check failed: {e}")
+        return JsonResponse({'status': 'unavailable'}, status=503)
+    return JsonResponse({'status': 'ready'})
@@ -0,0 +1,252 @@
+"""
+Профилирование API по запросу.
+POST /debug/profile запускает окно на seconds секунд или requests
+запросов, DELETE завершает его досрочно, GET показывает состояние.
+Эндпоинт закрыт токеном PROFILE_TOKEN (заголовок X-Profile-Token);
+без токена в настройках он отвечает 404.
+
+Результаты пишутся в PROFILE_DIR: .pstats (cProfile) или .collapsed
+(свернутые стеки для flamegraph.pl и speedscope). Окно действует в
+процессе, получившем запрос; вне окна middleware только проверяет
+одну переменную модуля.
+"""
+
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sample')
+# Адрес эндпоинта; его собственные запросы не профилируются.
+PROFILE_PATH = 'debug/profile'
+# Интервал снятия стеков в режиме sample, секунд.
+SAMPLE_INTERVAL = 0.005
+
+_session = None
+_last_result = None
+_session_lock = threading.Lock()
+
+
+def _collapse_stack(frame):
+    """Стек кадра в формате flamegraph: от корня к листу через ';'."""
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        labels.append(f"{code.co_name} "
+                      f"({os.path.basename(code.co_filename)}:"
+                      f"{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class ProfileSession:
+    """Окно профилирования запросов: по времени и/или числу запросов."""
+    
+    def __init__(self, mode, path_prefix, seconds, max_requests=None):
+        self.mode = mode
+        self.path_prefix = path_prefix
+        self.seconds = seconds
+        self.max_requests = max_requests
+        self.requests = 0
+        self._lock = threading.Lock()
+        # cProfile: один профилируемый запрос за раз, статистика копится.
+        self._profile_lock = threading.Lock()
+        self._stats = None
+        # sample: потоки, которые сейчас обрабатывают запросы.
+        self._active_threads = set()
+        self._stacks = Counter()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True,
+                                         name='stack-sampler')
+        self._timer = threading.Timer(seconds, stop_session)
+        self._timer.daemon = True
+    
+    def start(self):
+        if self.mode == 'sample':
+            self._sampler.start()
+        self._timer.start()
+    
+    def profile(self, get_response, request):
+        """Обрабатывает запрос под профилировщиком."""
+        if self.mode == 'sample':
+            thread_id = threading.get_ident()
+            self._active_threads.add(thread_id)
+            try:
+                response = get_response(request)
+            finally:
+                self._active_threads.discard(thread_id)
+        elif self._profile_lock.acquire(blocking=False):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                try:
+                    response = get_response(request)
+                finally:
+                    profile.disable()
+                with self._lock:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profile)
+                    else:
+                        self._stats.add(profile)
+            finally:
+                self._profile_lock.release()
+        else:
+            # Параллельный запрос: профилировщик потока уже занят.
+            return get_response(request)
+        
+        with self._lock:
+            self.requests += 1
+            done = self.requests == self.max_requests
+        if done:
+            stop_session()
+        return response
+    
+    def _sample(self):
+        while not self._stopped.wait(SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            for thread_id in list(self._active_threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self._stacks[_collapse_stack(frame)] += 1
+    
+    def stop(self):
+        """Останавливает сбор, пишет результаты и возвращает сводку."""
+        self._timer.cancel()
+        self._stopped.set()
+        if self.mode == 'sample':
+            self._sampler.join()
+            path = f"{self.path_prefix}.collapsed"
+            with open(path, 'w') as output:
+                for stack, count in self._stacks.most_common():
+                    output.write(f"{stack} {count}\n")
+            top = Counter()
+            for stack, count in self._stacks.items():
+                top[stack.rsplit(';', 1)[-1]] += count
+            summary = [f"{count} {label}"
+                       for label, count in top.most_common(10)]
+        else:
+            path = f"{self.path_prefix}.pstats"
+            with self._profile_lock, self._lock:
+                stats = self._stats
+            if stats is None:
+                path, summary = None, []
+            else:
+                stats.dump_stats(path)
+                output = io.StringIO()
+                stats.stream = output
+                stats.sort_stats('cumulative').print_stats(10)
+                summary = output.getvalue().splitlines()
+        
+        logger.info(f"Profile saved: {path}")
+        return {'path': path, 'requests': self.requests,
+                'summary': summary}
+    
+    def status(self):
+        return {'mode': self.mode, 'seconds': self.seconds,
+                'max_requests': self.max_requests,
+                'requests': self.requests}
+
+
+def start_session(mode, seconds, max_requests=None):
+    """Открывает окно профилирования; None, если оно уже открыто."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            return None
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        # pid в имени: у каждого процесса сервера свое окно и свои файлы.
+        prefix = os.path.join(settings.PROFILE_DIR,
+                              f"api-{os.getpid()}-{stamp}")
+        _session = ProfileSession(
+            mode, prefix, min(seconds, settings.PROFILE_MAX_SECONDS),
+            max_requests)
+        _session.start()
+        return _session
+
+
+def stop_session():
+    """Закрывает окно профилирования и возвращает его результат."""
+    global _session, _last_result
+    with _session_lock:
+        session, _session = _session, None
+    if session is None:
+        return None
+    _last_result = session.stop()
+    return _last_result
+
+
+class ProfilingMiddleware:
+    """Пропускает запросы через открытое окно профилирования."""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        session = _session
+        if session is None or request.path.lstrip('/') == PROFILE_PATH:
+            return self.get_response(request)
+        return session.profile(self.get_response, request)
+
+
+@csrf_exempt
+def profile_view(request):
+    """GET - состояние, POST - запуск окна, DELETE - остановка."""
+    token = settings.PROFILE_TOKEN
+    if not token:
+        raise Http404
+    # Байты, а не str: compare_digest не принимает строки не из ASCII.
+    if not hmac.compare_digest(
+            request.headers.get('X-Profile-Token', '').encode(),
+            token.encode()):
+        return JsonResponse({'error': 'invalid token'}, status=403)
+    
+    if request.method == 'GET':
+        session = _session
+        return JsonResponse({
+            'active': session is not None,
+            'session': session.status() if session else None,
+            'last_result': _last_result,
+        })
+    
+    if request.method == 'DELETE':
+        result = stop_session()
+        if result is None:
+            return JsonResponse({'error': 'profiling is not active'},
+                                status=409)
+        return JsonResponse(result)
+    
+    if request.method != 'POST':
+        return JsonResponse({'error': 'method not allowed'}, status=405)
+    
+    mode = request.GET.get('mode', 'cprofile')
+    if mode not in PROFILE_MODES:
+        return JsonResponse(
+            {'error': f"mode must be one of: {', '.join(PROFILE_MODES)}"},
+            status=400)
+    try:
+        seconds = int(request.GET.get('seconds', 30))
+        max_requests = request.GET.get('requests')
+        max_requests = int(max_requests) if max_requests else None
+    except ValueError:
+        return JsonResponse({'error': 'seconds and requests must be '
+                                      'integers'}, status=400)
+    
+    session = start_session(mode, seconds, max_requests)
+    if session is None:
+        return JsonResponse({'error': 'profiling is already active'},
+                            status=409)
+    return JsonResponse({'active': True, 'session': session.status()},
+                        status=201)
@@ -21,11 +21,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы профиль включал время всех остальных middleware.
+    'calendar_project.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'calendar_project.db_router.ReadYourWritesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -58,9 +61,44 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', 'postgres'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Имя приложения попадает в уведомления ленты изменений.
+        'OPTIONS': {'application_name': 'calendar_api'},
+        # Постоянные соединения: запросы не платят за подключение к БД.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Реплики для чтения: DB_REPLICA_HOSTS=host1:5432,host2:5432.
+for index, replica in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['calendar_project.db_router.ReplicaRouter']
+
+# Закрепление за primary после записи хранится в кэше. С репликами он
+# должен быть общим для всех процессов (gunicorn), поэтому это таблица
+# django_cache на primary (создается python -m bot.migrate).
+if len(DATABASES) > 1:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
+# Сколько секунд после записи читать данные пользователя с primary.
+DB_STICKY_SECONDS = int(os.getenv('DB_STICKY_SECONDS', '5'))
+# Допустимое отставание реплики и период его проверки, секунд.
+DB_MAX_REPLICA_LAG = float(os.getenv('DB_MAX_REPLICA_LAG', '2'))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '5'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -83,3 +121,12 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# calendar_members имеет составной ключ; модель CalendarMember объявляет
+# первичным ключом внешний ключ calendar, о чем Django предупреждает.
+SILENCED_SYSTEM_CHECKS = ['fields.W342']
+
+# Профилирование по запросу (/debug/profile): без токена выключено.
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', str(BASE_DIR / 'profiles'))
+PROFILE_MAX_SECONDS = int(os.getenv('PROFILE_MAX_SECONDS', '300'))
@@ -1,21 +1,22 @@
 """
-URL-конфигурация для API приложения.
-Определяет все эндпоинты REST API.
+URL-конфигурация проекта.
+Все эндпоинты REST API подключаются под префиксом /api/,
+пробы контейнера - под /health/, профилирование - /debug/profile.
 """
 
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from .views import EventViewSet
-
-# Создаем роутер DRF (Django REST Framework).
-router = DefaultRouter()
-# Регистрируем ViewSet для событий.
-# Будет автоматически созданы следующие маршруты:
-# - /api/events/ (GET список, POST создание)
-# - /api/events/{id}/ (GET детали, PUT обновление, PATCH частичное обновление, DELETE удаление)
-router.register(r'events', EventViewSet, basename='event')
+from . import health, profiling
 
 urlpatterns = [
-    # Подключаем все маршруты из роутера.
-    path('', include(router.urls)),
+    # Маршруты API:
+    # - /api/events/ (GET список, POST создание)
+    # - /api/events/{id}/ (GET детали, PUT обновление, PATCH частичное обновление, DELETE удаление)
+    # - /api/events/stream?user_id= (Server-Sent Events с изменениями)
+    # - /api/events/batch (POST пакет create/update/delete)
+    path('api/', include('calendar_project.api.urls')),
+    # Пробы для оркестратора.
+    path('health/live', health.live, name='health-live'),
+    path('health/ready', health.ready, name='health-ready'),
+    # Профилирование по токену (см. profiling.py).
+    path(profiling.PROFILE_PATH, profiling.profile_view, name='profile'),
 ]
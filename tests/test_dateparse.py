@@ -0,0 +1,104 @@
+from datetime import date
+
+import pytest
+
+from bot.dateparse import (_parse_quick_cached, parse_date,
+                           parse_quick_event, parse_time_range)
+
+# Понедельник.
+TODAY = date(2026, 10, 19)
+
+
+def test_parse_date_formats():
+    assert parse_date('2026-12-15', TODAY) == '2026-12-15'
+    assert parse_date('15.12', TODAY) == '2026-12-15'
+    assert parse_date('15.12.2027', TODAY) == '2027-12-15'
+    assert parse_date('31.02', TODAY) is None
+    assert parse_date('встреча', TODAY) is None
+
+
+def test_parse_date_without_year_rolls_to_next_year():
+    assert parse_date('01.02', TODAY) == '2027-02-01'
+
+
+def test_parse_date_relative():
+    assert parse_date('сегодня', TODAY) == '2026-10-19'
+    assert parse_date('Завтра', TODAY) == '2026-10-20'
+    assert parse_date('послезавтра', TODAY) == '2026-10-21'
+    assert parse_date('day after tomorrow', TODAY) == '2026-10-21'
+    assert parse_date('через 10 дней', TODAY) == '2026-10-29'
+    assert parse_date('in 3 days', TODAY) == '2026-10-22'
+
+
+def test_parse_date_weekdays():
+    assert parse_date('пятница', TODAY) == '2026-10-23'
+    assert parse_date('в среду', TODAY) == '2026-10-21'
+    assert parse_date('friday', TODAY) == '2026-10-23'
+    # Тот же день недели: сегодня, а с «next» - через неделю.
+    assert parse_date('monday', TODAY) == '2026-10-19'
+    assert parse_date('next monday', TODAY) == '2026-10-26'
+    assert parse_date('в следующий понедельник', TODAY) == '2026-10-26'
+
+
+def test_quick_event_full():
+    event = parse_quick_event('Планерка завтра 10:00-11:30 #обсудить план',
+                              TODAY)
+    assert event.name == 'Планерка'
+    assert event.date == '2026-10-20'
+    assert event.time == '10:00'
+    assert event.duration == 90
+    assert event.details == 'обсудить план'
+
+
+def test_quick_event_requires_date_and_name():
+    assert parse_quick_event('Планерка 10:00', TODAY) is None
+    assert parse_quick_event('завтра 10:00', TODAY) is None
+
+
+def test_quick_event_skips_unresolvable_date_like_numbers():
+    event = parse_quick_event('Release 2.0 tomorrow 10:00', TODAY)
+    assert event.name == 'Release 2.0'
+    assert event.date == '2026-10-20'
+    assert event.time == '10:00'
+
+
+def test_quick_event_does_not_take_date_from_version_number():
+    event = parse_quick_event('Version 1.2.3 tomorrow', TODAY)
+    assert event.name == 'Version 1.2.3'
+    assert event.date == '2026-10-20'
+
+
+def test_quick_event_twelve_hour_clock():
+    assert parse_quick_event('Meet friday 12am', TODAY).time == '00:00'
+    assert parse_quick_event('Meet friday 12pm', TODAY).time == '12:00'
+    assert parse_quick_event('Meet friday at 3pm', TODAY).time == '15:00'
+    assert parse_quick_event('Meet friday 13pm', TODAY) is None
+    assert parse_quick_event('Meet friday 25pm', TODAY) is None
+    assert parse_quick_event('Meet friday 0am', TODAY) is None
+
+
+def test_quick_event_rejects_reversed_interval():
+    assert parse_quick_event('Meet friday 15:00-14:00', TODAY) is None
+
+
+def test_parse_time_range():
+    assert parse_time_range('09:30') == ('09:30', None)
+    assert parse_time_range('14:00-15:45') == ('14:00', 105)
+    assert parse_time_range('14:00 - 14:15') == ('14:00', 15)
+    with pytest.raises(ValueError):
+        parse_time_range('15:00-14:00')
+    with pytest.raises(ValueError):
+        parse_time_range('25:00')
+
+
+def test_quick_event_cache_is_keyed_by_today():
+    _parse_quick_cached.cache_clear()
+    first = parse_quick_event('Standup tomorrow', TODAY)
+    again = parse_quick_event('  Standup tomorrow  ', TODAY)
+    assert again is first
+    assert _parse_quick_cached.cache_info().hits == 1
+    
+    # На следующий день та же строка дает другую дату.
+    next_day = parse_quick_event('Standup tomorrow', date(2026, 10, 20))
+    assert next_day.date == '2026-10-21'
+    assert _parse_quick_cached.cache_info().misses == 2
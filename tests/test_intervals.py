@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta
+
+from bot.intervals import Interval, IntervalTree
+
+DAY = datetime(2026, 10, 19)
+
+
+def at(hours, minutes=0):
+    return DAY + timedelta(hours=hours, minutes=minutes)
+
+
+def test_overlapping_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(200):
+        intervals = []
+        for payload in range(rng.randrange(0, 30)):
+            start = at(0, rng.randrange(0, 24 * 60))
+            intervals.append(Interval(
+                start, start + timedelta(minutes=rng.randrange(0, 180)),
+                payload))
+        tree = IntervalTree(intervals)
+        
+        start = at(0, rng.randrange(0, 24 * 60))
+        end = start + timedelta(minutes=rng.randrange(1, 240))
+        expected = sorted(i.payload for i in intervals
+                          if i.start < i.end and i.start < end
+                          and i.end > start)
+        assert sorted(i.payload for i in tree.overlapping(start, end)) == \
+            expected
+
+
+def test_overlapping_is_half_open():
+    tree = IntervalTree([Interval(at(10), at(11), 'a')])
+    assert tree.overlapping(at(11), at(12)) == []
+    assert tree.overlapping(at(9), at(10)) == []
+    assert [i.payload for i in tree.overlapping(at(10, 59), at(12))] == ['a']
+
+
+def test_empty_intervals_are_dropped():
+    tree = IntervalTree([Interval(at(10), at(10)), Interval(at(11), at(10))])
+    assert len(tree) == 0
+    assert tree.overlapping(at(0), at(23)) == []
+
+
+def test_free_slots_between_and_around_events():
+    tree = IntervalTree([
+        Interval(at(9), at(10)),
+        Interval(at(9, 30), at(11)),
+        Interval(at(13), at(14)),
+    ])
+    assert tree.free_slots(at(8), at(18)) == [
+        (at(8), at(9)), (at(11), at(13)), (at(14), at(18)),
+    ]
+
+
+def test_free_slots_with_touching_and_clipped_events():
+    tree = IntervalTree([
+        Interval(at(7), at(9)),
+        Interval(at(9), at(10)),
+        Interval(at(17), at(23)),
+    ])
+    assert tree.free_slots(at(8), at(18)) == [(at(10), at(17))]
+
+
+def test_free_slots_min_duration_is_inclusive():
+    tree = IntervalTree([Interval(at(9, 15), at(10)),
+                         Interval(at(10, 14), at(11))])
+    slots = tree.free_slots(at(9), at(11, 15), timedelta(minutes=15))
+    assert slots == [(at(9), at(9, 15)), (at(11), at(11, 15))]
+
+
+def test_free_slots_without_events():
+    assert IntervalTree().free_slots(at(8), at(22)) == [(at(8), at(22))]
@@ -0,0 +1,73 @@
+from bot.rendering import (CACHED_DETAILS_LIMIT, FRAGMENT_LIMIT, SEPARATOR,
+                           _render_fragment, escape_truncated,
+                           message_length, pack_messages, render_event)
+
+
+def fragments(*lengths):
+    return [('x' * length, length) for length in lengths]
+
+
+def test_message_length_counts_utf16_units():
+    assert message_length('abc') == 3
+    assert message_length('встреча') == 7
+    # Эмодзи вне BMP - суррогатная пара, две единицы.
+    assert message_length('📅') == 2
+
+
+def test_escape_truncated_keeps_short_text():
+    assert escape_truncated('a < b', 10) == 'a &lt; b'
+
+
+def test_escape_truncated_never_splits_entities():
+    assert escape_truncated('a&b&c', 7) == 'a&amp;…'
+    # Сущность целиком не помещается - она отбрасывается, а не режется.
+    assert escape_truncated('a&b&c', 6) == 'a…'
+
+
+def test_escape_truncated_counts_surrogate_pairs():
+    text = escape_truncated('📅📅📅', 5)
+    assert text == '📅📅…'
+    assert message_length(text) == 5
+
+
+def test_pack_messages_splits_on_limit():
+    separator_length = message_length(SEPARATOR)
+    limit = 2 * (10 + separator_length)
+    messages = pack_messages(fragments(10, 10, 10), limit=limit)
+    assert len(messages) == 2
+    assert all(message_length(text) <= limit for text in messages)
+
+
+def test_pack_messages_fits_exactly_at_limit():
+    separator_length = message_length(SEPARATOR)
+    messages = pack_messages(fragments(10), header='h' * 5,
+                             limit=5 + 10 + separator_length)
+    assert messages == ['h' * 5 + 'x' * 10 + SEPARATOR]
+
+
+def test_pack_messages_sends_oversized_header_alone():
+    separator_length = message_length(SEPARATOR)
+    limit = 100 + separator_length
+    messages = pack_messages(fragments(100, 10), header='h' * 50,
+                             limit=limit)
+    assert messages[0] == 'h' * 50
+    assert messages[1].startswith('x' * 100)
+    assert all(message_length(text) <= limit for text in messages)
+
+
+def test_pack_messages_without_fragments_sends_nothing():
+    assert pack_messages([], header='header') == []
+
+
+def test_render_event_long_details_bypass_cache():
+    _render_fragment.cache_clear()
+    event = {'id': 1, 'event_name': 'Встреча', 'event_date': '2026-10-19',
+             'event_details': 'я' * (FRAGMENT_LIMIT * 3)}
+    fragment, length = render_event(event)
+    assert length <= FRAGMENT_LIMIT
+    assert fragment.endswith('…')
+    assert _render_fragment.cache_info().currsize == 0
+    
+    event['event_details'] = 'я' * CACHED_DETAILS_LIMIT
+    render_event(event)
+    assert _render_fragment.cache_info().currsize == 1
@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip('telegram')
+
+from bot.throttle import UpdateThrottle  # noqa: E402
+
+
+def test_burst_then_mute():
+    throttle = UpdateThrottle(burst=3, refill_rate=1.0, mute_seconds=60)
+    assert [throttle.allow(1, now=0.0) for _ in range(3)] == \
+        [(True, False)] * 3
+    # Первое лишнее обновление - предупреждение, дальше молча.
+    assert throttle.allow(1, now=0.0) == (False, True)
+    assert throttle.allow(1, now=1.0) == (False, False)
+    assert throttle.dropped_updates == 2
+    assert throttle.mutes == 1
+
+
+def test_refill_is_capped_by_burst():
+    throttle = UpdateThrottle(burst=2, refill_rate=1.0)
+    throttle.allow(1, now=0.0)
+    throttle.allow(1, now=0.0)
+    # За 100 секунд ведро наполняется только до burst.
+    assert throttle.allow(1, now=100.0) == (True, False)
+    assert throttle.allow(1, now=100.0) == (True, False)
+    assert throttle.allow(1, now=100.0) == (False, True)
+
+
+def test_partial_refill():
+    throttle = UpdateThrottle(burst=1, refill_rate=0.5, mute_seconds=10)
+    assert throttle.allow(1, now=0.0) == (True, False)
+    assert throttle.allow(1, now=1.0) == (False, True)
+    throttle = UpdateThrottle(burst=1, refill_rate=0.5, mute_seconds=10)
+    throttle.allow(1, now=0.0)
+    assert throttle.allow(1, now=2.0) == (True, False)
+
+
+def test_mute_expires():
+    throttle = UpdateThrottle(burst=1, refill_rate=1.0, mute_seconds=60)
+    throttle.allow(1, now=0.0)
+    assert throttle.allow(1, now=0.5) == (False, True)
+    assert throttle.allow(1, now=60.4) == (False, False)
+    assert throttle.allow(1, now=60.5) == (True, False)
+
+
+def test_users_are_independent():
+    throttle = UpdateThrottle(burst=1)
+    assert throttle.allow(1, now=0.0) == (True, False)
+    assert throttle.allow(2, now=0.0) == (True, False)
+    assert throttle.allow(1, now=0.0) == (False, True)
+
+
+def test_least_recently_seen_user_is_evicted():
+    throttle = UpdateThrottle(burst=2, max_users=2)
+    throttle.allow(1, now=0.0)
+    throttle.allow(2, now=0.0)
+    # Пользователь 1 обращался последним: вытесняется 2.
+    throttle.allow(1, now=0.0)
+    throttle.allow(3, now=0.0)
+    assert throttle.allow(1, now=0.0) == (False, True)
+    # Вытесненный пользователь начинает с полного ведра.
+    assert throttle.allow(2, now=0.0) == (True, False)